@@ -0,0 +1,191 @@
+"""
+Bitboard representation of a Tic Tac Toe state
+
+Cell (i, j) is bit 3 * i + j. A state holds one 9-bit mask per player,
+and every per-mask question (wins, piece count, empty cells) is answered
+by a table computed once at import time.
+"""
+
+from collections import namedtuple
+
+X = "X"
+O = "O"
+EMPTY = None
+
+State = namedtuple("State", ["x", "o"])
+
+FULL = 0b111111111
+
+WIN_LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# (i, j) coordinates of each cell index
+CELLS = tuple(divmod(cell, 3) for cell in range(9))
+
+# Alpha-beta move ordering: center, then corners, then edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Lookup tables indexed by a 9-bit mask
+WINS = tuple(
+    any(mask & line == line for line in WIN_LINES) for mask in range(512)
+)
+COUNTS = tuple(bin(mask).count("1") for mask in range(512))
+MOVES = tuple(
+    tuple(cell for cell in range(9) if not mask >> cell & 1)
+    for mask in range(512)
+)
+ORDERED_MOVES = tuple(
+    tuple(cell for cell in MOVE_ORDER if not mask >> cell & 1)
+    for mask in range(512)
+)
+
+
+def _transform_table(mapping):
+    """
+    Returns the image of every mask under a cell permutation.
+    """
+    table = []
+    for mask in range(512):
+        image = 0
+        for cell in range(9):
+            if mask >> cell & 1:
+                image |= 1 << mapping(*CELLS[cell])
+        table.append(image)
+    return tuple(table)
+
+
+# The 8 rotations and reflections of the board
+SYMMETRIES = tuple(_transform_table(mapping) for mapping in (
+    lambda i, j: 3 * i + j,
+    lambda i, j: 3 * j + (2 - i),
+    lambda i, j: 3 * (2 - i) + (2 - j),
+    lambda i, j: 3 * (2 - j) + i,
+    lambda i, j: 3 * i + (2 - j),
+    lambda i, j: 3 * (2 - i) + j,
+    lambda i, j: 3 * j + i,
+    lambda i, j: 3 * (2 - j) + (2 - i),
+))
+
+INITIAL_STATE = State(0, 0)
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return INITIAL_STATE
+
+
+def player(state):
+    """
+    Returns player who has the next turn on a state.
+    """
+    return X if COUNTS[state.x] == COUNTS[state.o] else O
+
+
+def actions(state):
+    """
+    Returns the tuple of empty cell indices on the state.
+    """
+    return MOVES[state.x | state.o]
+
+
+def ordered_actions(state):
+    """
+    Returns the empty cell indices sorted by MOVE_ORDER.
+    """
+    return ORDERED_MOVES[state.x | state.o]
+
+
+def result(state, cell):
+    """
+    Returns the state that results from playing the cell index.
+    """
+    bit = 1 << cell
+    if (state.x | state.o) & bit:
+        raise ValueError
+    if COUNTS[state.x] == COUNTS[state.o]:
+        return State(state.x | bit, state.o)
+    return State(state.x, state.o | bit)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[state.x]:
+        return X
+    if WINS[state.o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINS[state.x] or WINS[state.o] or state.x | state.o == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINS[state.x]:
+        return 1
+    if WINS[state.o]:
+        return -1
+    return 0
+
+
+def encode(state):
+    """
+    Returns the state packed into a single 18-bit integer.
+    """
+    return state.x << 9 | state.o
+
+
+def decode(code):
+    """
+    Returns the state packed by encode.
+    """
+    return State(code >> 9, code & FULL)
+
+
+def canonical(state):
+    """
+    Returns the same encoding for a state and all of its rotations
+    and reflections.
+    """
+    x, o = state
+    return min(table[x] << 9 | table[o] for table in SYMMETRIES)
+
+
+def from_board(board):
+    """
+    Returns the state of a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return State(x, o)
+
+
+def to_board(state):
+    """
+    Returns the list-of-lists board of a state.
+    """
+    board = [[EMPTY, EMPTY, EMPTY] for _ in range(3)]
+    for cell, (i, j) in enumerate(CELLS):
+        if state.x >> cell & 1:
+            board[i][j] = X
+        elif state.o >> cell & 1:
+            board[i][j] = O
+    return board
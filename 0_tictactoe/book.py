@@ -0,0 +1,123 @@
+"""
+Perfect-play opening book for Tic Tac Toe
+
+The book holds one byte per board, indexed by the base 3 encoding of the
+cells (empty = 0, X = 1, O = 2). The low nibble is the best cell index and
+bits 4-5 hold the minimax value plus one. Boards that cannot be reached or
+are already over are stored as UNKNOWN.
+
+To rebuild the book after changing the search, run:
+    python book.py
+"""
+
+import os
+import struct
+import sys
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Bump whenever the search would pick different moves
+BOOK_VERSION = 1
+
+MAGIC = b"TTTB"
+HEADER = struct.Struct(">4sB")
+SIZE = 3 ** 9
+UNKNOWN = 0xFF
+
+# Base 3 weight of every 9-bit mask
+TERNARY = tuple(
+    sum(3 ** cell for cell in range(9) if mask >> cell & 1)
+    for mask in range(512)
+)
+
+# Lazily loaded table, False until the first lookup
+_table = False
+
+
+def index(state):
+    """
+    Returns the position of the bitboard state in the book.
+    """
+    return TERNARY[state.x] + 2 * TERNARY[state.o]
+
+
+def encode_entry(cell, value):
+    """
+    Returns the byte stored for a best cell and its value.
+    """
+    return (value + 1) << 4 | cell
+
+
+def decode_entry(entry):
+    """
+    Returns the (cell, value) pair stored in a byte, or None if unknown.
+    """
+    if entry == UNKNOWN:
+        return None
+    return entry & 0x0F, (entry >> 4) - 1
+
+
+def save(entries, path=BOOK_FILE):
+    """
+    Writes a dictionary of bitboard states to (cell, value) pairs.
+    """
+    table = bytearray([UNKNOWN]) * SIZE
+    for state, (cell, value) in entries.items():
+        table[index(state)] = encode_entry(cell, value)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, BOOK_VERSION))
+        f.write(table)
+
+
+def load(path=BOOK_FILE):
+    """
+    Returns the book table, or None if the file is missing or stale.
+    """
+    try:
+        with open(path, "rb") as f:
+            contents = f.read()
+    except OSError:
+        return None
+    if len(contents) != HEADER.size + SIZE:
+        return None
+    magic, version = HEADER.unpack_from(contents)
+    if magic != MAGIC or version != BOOK_VERSION:
+        return None
+    return contents[HEADER.size:]
+
+
+def lookup(state):
+    """
+    Returns the (cell, value) pair for the bitboard state, or None if the
+    book is unavailable or does not contain the state.
+    """
+    global _table
+    if _table is False:
+        _table = load()
+    if _table is None:
+        return None
+    return decode_entry(_table[index(state)])
+
+
+def reset():
+    """
+    Forgets the loaded table so that the next lookup reads the file again.
+    """
+    global _table
+    _table = False
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [output]")
+    path = sys.argv[1] if len(sys.argv) == 2 else BOOK_FILE
+
+    # Imported here since tictactoe looks moves up in this module
+    import tictactoe as ttt
+    entries = ttt.solve_all()
+    save(entries, path)
+    print(f"Wrote {len(entries)} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Monte Carlo Tree Search Tic Tac Toe Player
+
+An alternative to minimax for boards too large to search exhaustively.
+The search plays moves in place on a single mnk.Position: selection and
+expansion push moves down the tree, the random playout pushes to the end
+of the game, and everything is popped again before the next playout.
+"""
+
+import math
+import random
+import time
+
+import mnk
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Playouts run and statistics reused by the last search
+search_stats = {"playouts": 0, "reused": 0}
+
+
+class Node():
+    """
+    Search tree node for the position reached by playing `move` from `parent`
+    """
+
+    def __init__(self, position, parent=None, move=None):
+        self.parent = parent
+        self.move = move
+        self.player = position.turn
+        self.terminal = position.terminal()
+        self.children = {}
+        self.untried = [] if self.terminal else position.actions()
+
+        # Visit count and total reward for the player who moved into the node
+        self.visits = 0
+        self.reward = 0
+
+    def best_child(self, exploration):
+        """
+        Returns the child with the highest upper confidence bound.
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children.values(),
+            key=lambda child: (
+                child.reward / child.visits
+                + exploration * math.sqrt(log_visits / child.visits)
+            )
+        )
+
+
+class MCTS():
+    """
+    Monte Carlo Tree Search player using the UCT selection rule
+    """
+
+    def __init__(self, game=None, playouts=1000, time_budget=None,
+                 exploration=math.sqrt(2), seed=None):
+
+        # Game rules, defaulting to the classic 3x3 board
+        self.game = game if game is not None else mnk.Game()
+
+        # Stop after `playouts` playouts or `time_budget` seconds,
+        # whichever comes first
+        self.playouts = playouts
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+
+        # Tree kept between consecutive moves of the same game,
+        # and the board its root stands for
+        self.root = None
+        self.root_board = None
+
+    def reset(self):
+        """
+        Forgets the search tree, e.g. when a new game starts.
+        """
+        self.root = None
+        self.root_board = None
+
+    def find_root(self, board):
+        """
+        Returns the node for the board in the previous search tree, reached
+        by the last move played and the reply to it, or None if the board
+        is not in the tree.
+        """
+        if self.root is None:
+            return None
+
+        # Cells marked since the previous search
+        added = {}
+        for i, row in enumerate(board):
+            for j, mark in enumerate(row):
+                old = self.root_board[i][j]
+                if old == mark:
+                    continue
+                if old is not EMPTY or mark in added:
+                    return None
+                added[mark] = self.game.index((i, j))
+
+        node = self.root
+        for _ in range(len(added)):
+            if node.player not in added:
+                return None
+            node = node.children.get(added[node.player])
+            if node is None:
+                return None
+        return node
+
+    def search(self, board, cancel=None):
+        """
+        Returns the most visited action for the current player on the
+        board, or None if the game is over or the threading.Event
+        `cancel` is set during the search.
+        """
+        position = mnk.Position(self.game, board)
+        root = self.find_root(board)
+        if root is None:
+            root = Node(position)
+        root.parent = None
+        self.root = root
+        self.root_board = [row[:] for row in board]
+        search_stats["playouts"] = 0
+        search_stats["reused"] = root.visits
+        if root.terminal:
+            return None
+
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.monotonic() + self.time_budget
+        while self.playouts is None or search_stats["playouts"] < self.playouts:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            if cancel is not None and cancel.is_set():
+                return None
+            self.run_playout(root, position)
+            search_stats["playouts"] += 1
+
+        if not root.children:
+            return self.game.cell(root.untried[0])
+        best = max(root.children.values(), key=lambda child: child.visits)
+        return self.game.cell(best.move)
+
+    def run_playout(self, root, position):
+        """
+        Selects a leaf, expands it by one move, plays the game out at
+        random and backs up the result, leaving the position unchanged.
+        """
+        node = root
+        depth = 0
+        while not node.untried and node.children:
+            node = node.best_child(self.exploration)
+            position.push(node.move)
+            depth += 1
+
+        if node.untried:
+            move = node.untried.pop(self.rng.randrange(len(node.untried)))
+            position.push(move)
+            depth += 1
+            child = Node(position, node, move)
+            node.children[move] = child
+            node = child
+
+        if node.terminal:
+            value = position.utility()
+        else:
+            value = position.random_playout(self.rng)
+        for _ in range(depth):
+            position.pop()
+
+        while node is not None:
+            node.visits += 1
+            if node.parent is not None:
+                mover = node.parent.player
+                if value == 0:
+                    node.reward += 0.5
+                elif (value == 1) == (mover == X):
+                    node.reward += 1
+            node = node.parent
@@ -0,0 +1,428 @@
+"""
+Generalized m,n,k Tic Tac Toe Player
+
+Boards of any height and width where the first player to place k marks in
+a row, column or diagonal wins. Exhaustive minimax is impossible beyond
+3x3, so the AI runs an iterative-deepening alpha-beta search with a
+heuristic evaluation and a wall-clock budget per move.
+"""
+
+import math
+import random
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won game, well above any heuristic evaluation
+WIN_SCORE = 10 ** 9
+
+# Clock is checked every this many nodes
+CHECK_INTERVAL = 128
+
+# Moves are only generated this close to an existing mark
+NEIGHBOR_RADIUS = 2
+
+# Depth and nodes reached by the last search
+search_stats = {"depth": 0, "nodes": 0}
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget runs out.
+    """
+
+
+class Game():
+    """
+    m,n,k game representation
+    """
+
+    def __init__(self, height=3, width=3, k=3):
+
+        if k < 1 or k > max(height, width):
+            raise ValueError(f"Cannot place {k} in a row on a {height}x{width} board")
+
+        # Set board size and number of marks in a row needed to win
+        self.height = height
+        self.width = width
+        self.k = k
+
+        # Every line of k cells, and the lines going through each cell
+        self.lines = []
+        for i in range(height):
+            for j in range(width):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < height and 0 <= end_j < width:
+                        self.lines.append(tuple(
+                            (i + di * step, j + dj * step) for step in range(k)
+                        ))
+        self.cell_lines = {
+            (i, j): [] for i in range(height) for j in range(width)
+        }
+        for line in self.lines:
+            for cell in line:
+                self.cell_lines[cell].append(line)
+
+        # Heuristic weight of an open line holding a given number of marks
+        self.weights = [0] + [10 ** count for count in range(1, k + 1)]
+
+        # Tables used by Position, indexed by flat cell index i * width + j
+        line_ids = {line: index for index, line in enumerate(self.lines)}
+        self.index_lines = [
+            tuple(line_ids[line] for line in self.cell_lines[(i, j)])
+            for i in range(height) for j in range(width)
+        ]
+        self.index_neighbors = [
+            tuple(
+                ni * width + nj
+                for ni in range(max(0, i - NEIGHBOR_RADIUS), min(height, i + NEIGHBOR_RADIUS + 1))
+                for nj in range(max(0, j - NEIGHBOR_RADIUS), min(width, j + NEIGHBOR_RADIUS + 1))
+                if (ni, nj) != (i, j)
+            )
+            for i in range(height) for j in range(width)
+        ]
+        center = ((height - 1) / 2, (width - 1) / 2)
+        self.center_order = sorted(
+            range(height * width),
+            key=lambda index: (
+                abs(index // width - center[0]) + abs(index % width - center[1]), index
+            )
+        )
+
+    def index(self, action):
+        """
+        Returns the flat cell index of action (i, j).
+        """
+        return action[0] * self.width + action[1]
+
+    def cell(self, index):
+        """
+        Returns the action (i, j) of a flat cell index.
+        """
+        return divmod(index, self.width)
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.width for _ in range(self.height)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        count = sum(cell is not EMPTY for row in board for cell in row)
+        return X if count % 2 == 0 else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j)
+            for i in range(self.height)
+            for j in range(self.width)
+            if board[i][j] is EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.height and 0 <= j < self.width):
+            raise IndexError
+        if board[i][j] is not EMPTY:
+            raise ValueError
+        board_copy = [row[:] for row in board]
+        board_copy[i][j] = self.player(board)
+        return board_copy
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for line in self.lines:
+            i, j = line[0]
+            mark = board[i][j]
+            if mark is not EMPTY and all(board[i][j] == mark for i, j in line):
+                return mark
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner(board) is not None or not self.actions(board)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        the_winner = self.winner(board)
+        if the_winner == X:
+            return 1
+        if the_winner == O:
+            return -1
+        return 0
+
+    def line_score(self, xs, os):
+        """
+        Returns the heuristic score of a line holding xs X marks and os O marks.
+        """
+        if os == 0:
+            return self.weights[xs]
+        if xs == 0:
+            return -self.weights[os]
+        return 0
+
+
+class Position():
+    """
+    Mutable m,n,k game state, updated in place with push and pop
+
+    Every line keeps a count of the X and O marks on it, so a move only
+    updates the lines through its cell to detect a win and to keep the
+    heuristic score current.
+    """
+
+    def __init__(self, game, board=None):
+
+        self.game = game
+        self.cells = [EMPTY] * (game.height * game.width)
+        self.line_xs = [0] * len(game.lines)
+        self.line_os = [0] * len(game.lines)
+
+        # Number of marks within NEIGHBOR_RADIUS of each cell
+        self.near = [0] * len(self.cells)
+
+        # Stack of played cell indices
+        self.moves = []
+        self.empty_count = len(self.cells)
+        self.turn = X
+        self.winner = None
+
+        # Heuristic score from X's point of view: the sum of Game.line_score
+        # over every line
+        self.score = 0
+
+        # Buffer reused by every random playout
+        self.playout_moves = []
+
+        if board is not None:
+            for i, row in enumerate(board):
+                for j, mark in enumerate(row):
+                    if mark is not EMPTY:
+                        self.place(game.index((i, j)), mark)
+            self.turn = X if (len(self.cells) - self.empty_count) % 2 == 0 else O
+            self.moves.clear()
+
+    def place(self, index, mark):
+        """
+        Puts mark on the cell and updates the counters of its lines.
+        """
+        game = self.game
+        self.cells[index] = mark
+        self.empty_count -= 1
+        self.moves.append(index)
+        line_xs = self.line_xs
+        line_os = self.line_os
+        for line in game.index_lines[index]:
+            xs = line_xs[line]
+            os = line_os[line]
+            self.score -= game.line_score(xs, os)
+            if mark == X:
+                xs += 1
+                line_xs[line] = xs
+                if xs == game.k:
+                    self.winner = X
+            else:
+                os += 1
+                line_os[line] = os
+                if os == game.k:
+                    self.winner = O
+            self.score += game.line_score(xs, os)
+        for neighbor in game.index_neighbors[index]:
+            self.near[neighbor] += 1
+
+    def push(self, index):
+        """
+        Plays the current player's mark on the flat cell index.
+        """
+        if self.winner is not None or self.cells[index] is not EMPTY:
+            raise ValueError
+        self.place(index, self.turn)
+        self.turn = O if self.turn == X else X
+
+    def pop(self):
+        """
+        Takes back the last move played with push.
+        """
+        game = self.game
+        index = self.moves.pop()
+        mark = self.cells[index]
+        self.cells[index] = EMPTY
+        self.empty_count += 1
+        self.turn = mark
+        self.winner = None
+        line_xs = self.line_xs
+        line_os = self.line_os
+        for line in game.index_lines[index]:
+            xs = line_xs[line]
+            os = line_os[line]
+            self.score -= game.line_score(xs, os)
+            if mark == X:
+                xs -= 1
+                line_xs[line] = xs
+            else:
+                os -= 1
+                line_os[line] = os
+            self.score += game.line_score(xs, os)
+        for neighbor in game.index_neighbors[index]:
+            self.near[neighbor] -= 1
+
+    def actions(self):
+        """
+        Returns the list of empty cell indices.
+        """
+        cells = self.cells
+        return [index for index in self.game.center_order if cells[index] is EMPTY]
+
+    def candidates(self):
+        """
+        Returns the empty cell indices near a mark, closest to the center
+        first, or every empty cell index if there are none.
+        """
+        cells = self.cells
+        near = self.near
+        moves = [
+            index for index in self.game.center_order
+            if cells[index] is EMPTY and near[index]
+        ]
+        return moves or self.actions()
+
+    def terminal(self):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner is not None or self.empty_count == 0
+
+    def utility(self):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        if self.winner == X:
+            return 1
+        if self.winner == O:
+            return -1
+        return 0
+
+    def random_playout(self, rng=random):
+        """
+        Plays random moves until the game is over, takes them back and
+        returns the utility of the finished game.
+        """
+        moves = self.playout_moves
+        moves.clear()
+        cells = self.cells
+        for index in range(len(cells)):
+            if cells[index] is EMPTY:
+                moves.append(index)
+        rng.shuffle(moves)
+        played = 0
+        for index in moves:
+            if self.winner is not None:
+                break
+            self.push(index)
+            played += 1
+        value = self.utility()
+        for _ in range(played):
+            self.pop()
+        return value
+
+    def to_board(self):
+        """
+        Returns the list-of-lists board of the position.
+        """
+        width = self.game.width
+        return [self.cells[i:i + width] for i in range(0, len(self.cells), width)]
+
+
+def negamax(position, depth, alpha, beta, ply, deadline):
+    """
+    Recursive alpha-beta search returning the score of the position for
+    the player to move. Moves are played and taken back in place.
+    """
+    search_stats["nodes"] += 1
+    if search_stats["nodes"] % CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+        raise SearchTimeout
+
+    # The previous move won, so the player to move has lost
+    if position.winner is not None:
+        return -(WIN_SCORE - ply)
+    if position.empty_count == 0:
+        return 0
+    if depth == 0:
+        return position.score if position.turn == X else -position.score
+
+    v = -math.inf
+    for index in position.candidates():
+        position.push(index)
+        v = max(v, -negamax(position, depth - 1, -beta, -alpha, ply + 1, deadline))
+        position.pop()
+        alpha = max(alpha, v)
+        if alpha >= beta:
+            break
+    return v
+
+
+def search(game, board, time_budget=1.0, max_depth=None):
+    """
+    Returns the best action found for the current player on the board
+    within `time_budget` seconds, or None if the game is over.
+
+    The search deepens one ply at a time and always keeps the best move of
+    the deepest completed iteration, so it can stop at any moment.
+    """
+    search_stats["depth"] = 0
+    search_stats["nodes"] = 0
+    position = Position(game, board)
+    if position.terminal():
+        return None
+    deadline = time.monotonic() + time_budget
+    moves = position.candidates()
+    best_index = moves[0]
+    if max_depth is None:
+        max_depth = position.empty_count
+
+    for depth in range(1, max_depth + 1):
+        iteration_index = None
+        iteration_value = -math.inf
+        try:
+            for index in moves:
+                position.push(index)
+                v = -negamax(position, depth - 1, -math.inf, -iteration_value, 1, deadline)
+                position.pop()
+                if v > iteration_value:
+                    iteration_index, iteration_value = index, v
+        except SearchTimeout:
+            # The previous best move is searched first, so a partial
+            # iteration can only have replaced it with a better one
+            if iteration_index is not None:
+                best_index = iteration_index
+            break
+        best_index = iteration_index
+        search_stats["depth"] = depth
+
+        # Search the best move first in the next iteration
+        moves.remove(best_index)
+        moves.insert(0, best_index)
+
+        # A forced result will not change with more depth
+        if abs(iteration_value) >= WIN_SCORE - game.height * game.width:
+            break
+    return game.cell(best_index)
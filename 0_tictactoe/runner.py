@@ -1,9 +1,16 @@
 import pygame
 import sys
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import mcts
 import tictactoe as ttt
 
+# AI engine: "minimax" or "mcts"
+ENGINE = sys.argv[1] if len(sys.argv) > 1 else "minimax"
+if ENGINE not in ("minimax", "mcts"):
+    sys.exit("Usage: python runner.py [minimax|mcts]")
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -17,15 +24,44 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+clock = pygame.time.Clock()
+FPS = 60
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+mcts_player = mcts.MCTS()
+
+# The AI searches on a background thread so the window keeps rendering
+executor = ThreadPoolExecutor(max_workers=1)
+ai_move = None
+
+# Set to stop the searches of the current game when it is abandoned
+cancel = threading.Event()
+
+
+def compute_move(board, searcher, cancel):
+    """
+    Returns the AI move for the board using the selected engine, or None
+    if the search was cancelled.
+    """
+    if ENGINE == "mcts":
+        return searcher.search(board, cancel)
+    return ttt.minimax(board, cancel=cancel)
+
 
 while True:
 
+    # Position of a left click released in this frame, if any
+    mouse = None
+    reset = False
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            mouse = event.pos
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            reset = True
 
     screen.fill(black)
 
@@ -54,14 +90,10 @@ while True:
         screen.blit(playO, playORect)
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
+        if mouse is not None:
             if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.X
             elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.O
 
     else:
@@ -102,26 +134,25 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (pygame.time.get_ticks() // 300 % 4)
+            title = f"Computer thinking{dots}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Start the AI search, or apply its move once it is done
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = executor.submit(
+                    compute_move, [row[:] for row in board], mcts_player, cancel
+                )
+            elif ai_move.done():
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and user == player and not game_over:
-            mouse = pygame.mouse.get_pos()
+        if mouse is not None and user == player and not game_over:
             for i in range(3):
                 for j in range(3):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
@@ -134,13 +165,19 @@ while True:
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
             screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+            if mouse is not None and againButton.collidepoint(mouse):
+                reset = True
+
+        # Start over, dropping the search of the current game if running
+        if reset:
+            user = None
+            board = ttt.initial_state()
+            # The old search may still be running, so it gets a fresh
+            # player rather than having the one in use reset under it
+            cancel.set()
+            cancel = threading.Event()
+            mcts_player = mcts.MCTS()
+            ai_move = None
 
     pygame.display.flip()
+    clock.tick(FPS)
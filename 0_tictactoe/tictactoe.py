@@ -3,13 +3,106 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
 
+class TranspositionTable():
+    """
+    Cache of minimax values keyed on a canonical state, so that positions
+    reached by different move orders, rotations or reflections are only
+    searched once.
+    """
+
+    def __init__(self, max_size=None):
+
+        # Maximum number of entries kept, or None for no limit
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+        # Lookup counters
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, state):
+        """
+        Returns the cached value of the bitboard state, or None if it is unknown.
+        """
+        key = bitboard.canonical(state)
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def store(self, state, value):
+        """
+        Caches the value of the bitboard state, evicting the least recently
+        used entry if the table is full.
+        """
+        key = bitboard.canonical(state)
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.max_size is not None and len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and the current size of the table.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+
+# Table shared by every minimax call
+transposition_table = TranspositionTable()
+
+# Number of nodes visited by the last minimax call
+search_stats = {"nodes": 0}
+
+# Nodes searched between checks of the cancel event
+CHECK_INTERVAL = 256
+
+# Event that stops the running search when set, if any
+_cancel = None
+
+
+class SearchCancelled(Exception):
+    """
+    Raised inside the search once its cancel event is set
+    """
+
+
+def check_cancelled():
+    """
+    Raises SearchCancelled if the running search has been cancelled,
+    checking the event only every CHECK_INTERVAL nodes.
+    """
+    if (_cancel is not None and search_stats["nodes"] % CHECK_INTERVAL == 0
+            and _cancel.is_set()):
+        raise SearchCancelled
+
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -56,7 +149,7 @@ def result(board, action):
     if board[action[0]][action[1]] is not None:
         raise ValueError
     next_player = player(board)
-    board_copy = copy.deepcopy(board)
+    board_copy = [row[:] for row in board]
     board_copy[action[0]][action[1]] = next_player
     return board_copy
 
@@ -174,15 +267,22 @@ def utility(board):
     return output
 
 
-def max_value(board):
+def max_value(state):
     """
-    Recursive function to return the max value.
+    Recursive function to return the max value of a bitboard state.
     """
-    if terminal(board):
-        return utility(board)
-    v = -math.inf
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
+    search_stats["nodes"] += 1
+    check_cancelled()
+    v = transposition_table.get(state)
+    if v is not None:
+        return v
+    if bitboard.terminal(state):
+        v = bitboard.utility(state)
+    else:
+        v = -math.inf
+        for cell in bitboard.actions(state):
+            v = max(v, min_value(bitboard.result(state, cell)))
+    transposition_table.store(state, v)
     return v
 
 
@@ -190,22 +290,30 @@ def max_board(board):
     """
     Returns the action that has the path with the max value.
     """
+    state = bitboard.from_board(board)
     values = {}
     for action in actions(board):
-        cur_result = result(board, action)
+        cur_result = bitboard.result(state, 3 * action[0] + action[1])
         values[action] = min_value(cur_result)
     return max(values.items(), key=lambda values: values[1])[0]
 
 
-def min_value(board):
+def min_value(state):
     """
-    Recursive function to return the min value.
+    Recursive function to return the min value of a bitboard state.
     """
-    if terminal(board):
-        return utility(board)
-    v = math.inf
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
+    search_stats["nodes"] += 1
+    check_cancelled()
+    v = transposition_table.get(state)
+    if v is not None:
+        return v
+    if bitboard.terminal(state):
+        v = bitboard.utility(state)
+    else:
+        v = math.inf
+        for cell in bitboard.actions(state):
+            v = min(v, max_value(bitboard.result(state, cell)))
+    transposition_table.store(state, v)
     return v
 
 
@@ -213,21 +321,207 @@ def min_board(board):
     """
     Returns the action that has the path with the min value.
     """
+    state = bitboard.from_board(board)
     values = {}
     for action in actions(board):
-        cur_result = result(board, action)
+        cur_result = bitboard.result(state, 3 * action[0] + action[1])
         values[action] = max_value(cur_result)
     return min(values.items(), key=lambda values: values[1])[0]
 
 
-def minimax(board):
+def alpha_beta_value(state, alpha, beta):
+    """
+    Recursive function to return the value of a bitboard state, searching
+    only the moves that can change the result within the (alpha, beta) window.
+    """
+    search_stats["nodes"] += 1
+    check_cancelled()
+    v = transposition_table.get(state)
+    if v is not None:
+        return v
+    if bitboard.terminal(state):
+        v = bitboard.utility(state)
+        transposition_table.store(state, v)
+        return v
+    alpha_start, beta_start = alpha, beta
+    if bitboard.player(state) == X:
+        v = -math.inf
+        for cell in bitboard.ordered_actions(state):
+            v = max(v, alpha_beta_value(bitboard.result(state, cell), alpha, beta))
+            # A forced win cannot be improved on
+            if v >= beta or v == 1:
+                break
+            alpha = max(alpha, v)
+    else:
+        v = math.inf
+        for cell in bitboard.ordered_actions(state):
+            v = min(v, alpha_beta_value(bitboard.result(state, cell), alpha, beta))
+            if v <= alpha or v == -1:
+                break
+            beta = min(beta, v)
+
+    # Only exact values are safe to share with the plain minimax search
+    if alpha_start < v < beta_start or abs(v) == 1:
+        transposition_table.store(state, v)
+    return v
+
+
+def alpha_beta_board(board):
+    """
+    Returns the action with the best value for the current player.
+
+    Root actions are tried in the same order as max_board/min_board and
+    only a strictly better value replaces the current best, so the same
+    action is returned.
+    """
+    state = bitboard.from_board(board)
+    maximizing = bitboard.player(state) == X
+    best_action = None
+    best_value = -math.inf if maximizing else math.inf
+    for action in actions(board):
+        cur_result = bitboard.result(state, 3 * action[0] + action[1])
+        if maximizing:
+            v = alpha_beta_value(cur_result, best_value, math.inf)
+            if v > best_value:
+                best_action, best_value = action, v
+        else:
+            v = alpha_beta_value(cur_result, -math.inf, best_value)
+            if v < best_value:
+                best_action, best_value = action, v
+
+        # Stop at a forced win
+        if best_value == (1 if maximizing else -1):
+            break
+    return best_action
+
+
+def minimax(board, alpha_beta=False, use_book=True, cancel=None):
     """
     Returns the optimal action for the current player on the board.
+
+    The move is read from the opening book when it is available, and
+    searched otherwise. With alpha_beta=True the search prunes branches
+    that cannot change the result. The number of nodes visited is left
+    in search_stats["nodes"].
+
+    If the threading.Event `cancel` is set while searching, the search
+    stops and None is returned.
     """
+    global _cancel
+    search_stats["nodes"] = 0
     result = None
-    if not terminal(board):
-        if player(board) == X:
+    if terminal(board) or (cancel is not None and cancel.is_set()):
+        return result
+
+    entry = None
+    if use_book:
+        entry = book.lookup(bitboard.from_board(board))
+    if entry is not None:
+        return bitboard.CELLS[entry[0]]
+
+    _cancel = cancel
+    try:
+        if alpha_beta:
+            result = alpha_beta_board(board)
+        elif player(board) == X:
             result = max_board(board)
         elif player(board) == O:
             result = min_board(board)
-    return result        
+    except SearchCancelled:
+        result = None
+    finally:
+        _cancel = None
+    return result
+
+
+def solve_all():
+    """
+    Returns the optimal cell index and value of every reachable position
+    that is not over, keyed by bitboard state.
+    """
+    entries = {}
+    frontier = [bitboard.initial_state()]
+    while frontier:
+        state = frontier.pop()
+        if state in entries or bitboard.terminal(state):
+            continue
+        action = minimax(bitboard.to_board(state), use_book=False)
+        cell = 3 * action[0] + action[1]
+        child = bitboard.result(state, cell)
+        if bitboard.player(state) == X:
+            value = min_value(child)
+        else:
+            value = max_value(child)
+        entries[state] = (cell, value)
+        for cell in bitboard.actions(state):
+            frontier.append(bitboard.result(state, cell))
+    return entries
+
+
+def state_value(code):
+    """
+    Returns the minimax value of an encoded bitboard state.
+    """
+    state = bitboard.decode(code)
+    if bitboard.player(state) == X:
+        return max_value(state)
+    return min_value(state)
+
+
+def solve_encoded(code):
+    """
+    Returns the optimal cell index (None if the game is over) and the
+    minimax value of an encoded bitboard state.
+    """
+    state = bitboard.decode(code)
+    if bitboard.terminal(state):
+        return None, bitboard.utility(state)
+    entry = book.lookup(state)
+    if entry is not None:
+        return entry
+    i, j = minimax(bitboard.to_board(state))
+    cell = 3 * i + j
+    return cell, state_value(bitboard.encode(bitboard.result(state, cell)))
+
+
+def minimax_batch(boards, workers=None):
+    """
+    Returns a list of (action, value) pairs, one per board and in the same
+    order, where action is what minimax would play (None if the game is
+    over) and value is 1, 0 or -1 as in utility.
+
+    Boards are sent to a pool of `workers` processes as encoded bitboards.
+    A single board has its root moves split across the pool instead.
+    """
+    codes = [bitboard.encode(bitboard.from_board(board)) for board in boards]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if len(codes) == 1 and not terminal(boards[0]):
+            return [split_root(boards[0], executor)]
+        chunksize = max(1, len(codes) // (workers * 4))
+        solved = list(executor.map(solve_encoded, codes, chunksize=chunksize))
+    return [
+        (None if cell is None else bitboard.CELLS[cell], value)
+        for cell, value in solved
+    ]
+
+
+def split_root(board, executor):
+    """
+    Returns the (action, value) pair of a board by evaluating each of its
+    root moves in a separate task.
+    """
+    state = bitboard.from_board(board)
+    moves = list(actions(board))
+    codes = [
+        bitboard.encode(bitboard.result(state, 3 * i + j)) for i, j in moves
+    ]
+    values = list(executor.map(state_value, codes))
+
+    # Keep the first best move, as max_board/min_board do
+    if player(board) == X:
+        best = max(range(len(moves)), key=lambda index: values[index])
+    else:
+        best = min(range(len(moves)), key=lambda index: values[index])
+    return moves[best], values[best]
@@ -0,0 +1,122 @@
+"""
+Linear algebra deductions for Minesweeper
+
+Every sentence is a linear equation over the frontier cells: the sum of
+its cells, each 0 or 1, equals its count. Row reducing all the equations
+of a component at once finds conclusions that need three or more
+sentences together, which pairwise subset checks miss.
+"""
+
+import numpy as np
+
+from probability import frontier_components
+
+# Components already known to prove nothing, keyed by frozenset of sentences
+CACHE_SIZE = 4096
+_settled = set()
+
+# Largest entry eliminated in int64: products of two such entries and
+# their differences stay well inside the int64 range
+SAFE_ENTRY = 1 << 30
+
+
+def row_reduce(matrix):
+    """
+    Returns an integer augmented matrix reduced to reduced row echelon
+    form, keeping integer entries by scaling rows instead of dividing.
+
+    The matrix is reduced in place while its entries are small enough for
+    int64. Once an entry grows past SAFE_ENTRY, the rest of the reduction
+    works on a copy of Python integers, which cannot overflow.
+    """
+    rows, columns = matrix.shape
+    pivot_row = 0
+    for column in range(columns - 1):
+        if pivot_row == rows:
+            break
+        nonzero = np.flatnonzero(matrix[pivot_row:, column])
+        if len(nonzero) == 0:
+            continue
+        swap = pivot_row + nonzero[0]
+        if swap != pivot_row:
+            matrix[[pivot_row, swap]] = matrix[[swap, pivot_row]]
+
+        # Eliminate the column from every other row
+        pivot = matrix[pivot_row, column]
+        factors = matrix[:, column].copy()
+        factors[pivot_row] = 0
+        changed = factors != 0
+        if changed.any():
+            matrix[changed] = (
+                matrix[changed] * pivot
+                - np.outer(factors[changed], matrix[pivot_row])
+            )
+            divisors = np.gcd.reduce(matrix[changed], axis=1)
+            divisors[divisors == 0] = 1
+            matrix[changed] //= np.abs(divisors)[:, None]
+            if matrix.dtype != object and np.abs(matrix).max() > SAFE_ENTRY:
+                matrix = matrix.astype(object)
+        pivot_row += 1
+    return matrix
+
+
+def deduce_component(sentences):
+    """
+    Returns the sets of cells of a component of sentences that are
+    certainly mines and certainly safe.
+    """
+    cells = sorted({cell for sentence in sentences for cell in sentence.cells})
+    column = {cell: index for index, cell in enumerate(cells)}
+    matrix = np.zeros((len(sentences), len(cells) + 1), dtype=np.int64)
+    for row, sentence in enumerate(sentences):
+        matrix[row, [column[cell] for cell in sentence.cells]] = 1
+        matrix[row, -1] = sentence.count
+    matrix = row_reduce(matrix)
+
+    coefficients = matrix[:, :-1]
+    targets = matrix[:, -1]
+    highest = np.where(coefficients > 0, coefficients, 0).sum(axis=1)
+    lowest = np.where(coefficients < 0, coefficients, 0).sum(axis=1)
+
+    mines = set()
+    safes = set()
+    for row in np.flatnonzero(coefficients.any(axis=1)):
+
+        # Only one assignment reaches the row's largest or smallest sum
+        if targets[row] == highest[row]:
+            positive, negative = mines, safes
+        elif targets[row] == lowest[row]:
+            positive, negative = safes, mines
+        else:
+            continue
+        positive.update(cells[index] for index in np.flatnonzero(coefficients[row] > 0))
+        negative.update(cells[index] for index in np.flatnonzero(coefficients[row] < 0))
+    return mines, safes
+
+
+def deduce(sentences):
+    """
+    Returns the sets of cells that are certainly mines and certainly safe
+    given all the sentences, solving each independent component separately.
+
+    Components that did not change since they last proved nothing are
+    skipped, as are single sentences, which cannot prove anything unless
+    they are already solved.
+    """
+    mines = set()
+    safes = set()
+    for component in frontier_components(sentences):
+        if len(component) < 2:
+            continue
+        key = frozenset(component)
+        if key in _settled:
+            continue
+        component_mines, component_safes = deduce_component(component)
+        if component_mines or component_safes:
+            mines.update(component_mines)
+            safes.update(component_safes)
+        else:
+            if len(_settled) >= CACHE_SIZE:
+                _settled.clear()
+            _settled.add(key)
+    return mines, safes
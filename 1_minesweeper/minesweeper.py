@@ -1,5 +1,14 @@
 import itertools
 import random
+from collections import deque, namedtuple
+
+import numpy as np
+
+import elimination
+import probability
+
+# Random cells tried before scanning the board for an unconstrained cell
+SAMPLE_ATTEMPTS = 64
 
 
 class Minesweeper():
@@ -7,32 +16,53 @@ class Minesweeper():
     Minesweeper game representation
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, sparse=False):
 
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
         self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # A sparse board keeps only the set of mines, and counts the
+        # mines around a cell when asked, so that very large boards
+        # take memory in proportion to their mines rather than their area
+        self.sparse = sparse
+        if sparse:
+            self.board = None
+            self.counts = None
+            indices = random.sample(range(height * width), mines)
+            self.mines.update(divmod(index, width) for index in indices)
+        else:
+            self.place_mines(mines)
 
         # At first, player has found no mines
         self.mines_found = set()
 
+    def place_mines(self, mines):
+        """
+        Places mines on a dense board and counts the mines around every cell.
+        """
+        height, width = self.height, self.width
+
+        # Initialize an empty field with no mines
+        self.board = np.zeros((height, width), dtype=bool)
+
+        # Add mines at distinct random cells, seeded from `random`
+        # so that random.seed still reproduces a game
+        generator = np.random.default_rng(random.getrandbits(64))
+        indices = generator.choice(height * width, size=mines, replace=False)
+        self.board.flat[indices] = True
+        self.mines.update(divmod(index, width) for index in indices.tolist())
+
+        # Count the mines around every cell at once, adding up the board
+        # shifted in each of the 8 directions (a 3x3 convolution)
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + height, dj:dj + width]
+
     def print(self):
         """
         Prints a text-based representation
@@ -41,7 +71,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if (i, j) in self.mines:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -49,8 +79,10 @@ class Minesweeper():
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
+        if self.sparse:
+            return cell in self.mines
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -58,23 +90,16 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        if not self.sparse:
+            return int(self.counts[i, j])
 
-        # Keep count of nearby mines
+        # Count the mines among the neighbors on a sparse board
         count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
+        for ni in range(max(i - 1, 0), min(i + 2, self.height)):
+            for nj in range(max(j - 1, 0), min(j + 2, self.width)):
+                if (ni, nj) != cell and (ni, nj) in self.mines:
+                    count += 1
         return count
 
     def won(self):
@@ -136,17 +161,186 @@ class Sentence():
         if cell in self.cells:
             self.cells.remove(cell)
 
+    def freeze(self):
+        """
+        Returns the immutable form of the sentence.
+        """
+        return FrozenSentence(frozenset(self.cells), self.count)
+
+
+class FrozenSentence(namedtuple("FrozenSentence", ["cells", "count"])):
+    """
+    Immutable, hashable form of a Sentence,
+    keyed by its frozenset of cells and its count
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return f"{set(self.cells)} = {self.count}"
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        if len(self.cells) == self.count:
+            return self.cells
+        return frozenset()
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        if self.count == 0:
+            return self.cells
+        return frozenset()
+
+
+class KnowledgeBase():
+    """
+    Set of distinct frozen sentences with an index from each cell
+    to the sentences that mention it
+    """
+
+    def __init__(self):
+
+        # Sentences, and the sentences mentioning each cell
+        self.sentences = set()
+        self.index = {}
+
+        # Number of sentences dropped as empty, duplicate, solved or subsumed
+        self.pruned = 0
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        return iter(list(self.sentences))
+
+    def __contains__(self, sentence):
+        return sentence in self.sentences
+
+    def add(self, sentence):
+        """
+        Adds a frozen sentence to the knowledge base and returns True,
+        or returns False if it has no cells or is already known.
+        """
+        if not sentence.cells or sentence in self.sentences:
+            self.pruned += 1
+            return False
+        self.sentences.add(sentence)
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(sentence)
+        return True
+
+    def remove(self, sentence):
+        """
+        Removes a frozen sentence from the knowledge base.
+        """
+        self.sentences.remove(sentence)
+        self.pruned += 1
+        for cell in sentence.cells:
+            cell_sentences = self.index[cell]
+            cell_sentences.discard(sentence)
+            if not cell_sentences:
+                del self.index[cell]
+
+    def overlapping(self, sentence):
+        """
+        Returns the other sentences sharing a cell with the sentence.
+        """
+        output = set()
+        for cell in sentence.cells:
+            output.update(self.index.get(cell, ()))
+        output.discard(sentence)
+        return output
+
+    def mark(self, cell, mines):
+        """
+        Replaces every sentence mentioning the cell by the sentence without
+        it, taking `mines` (1 or 0) off its count, and returns the list of
+        new sentences that were not already known.
+        """
+        changed = []
+        for sentence in list(self.index.get(cell, ())):
+            self.remove(sentence)
+            updated = FrozenSentence(sentence.cells - {cell}, sentence.count - mines)
+            if self.add(updated):
+                changed.append(updated)
+        return changed
+
+    def mark_mine(self, cell):
+        """
+        Marks the cell as a mine in every sentence that mentions it
+        and returns the new sentences.
+        """
+        return self.mark(cell, 1)
+
+    def mark_safe(self, cell):
+        """
+        Marks the cell as safe in every sentence that mentions it
+        and returns the new sentences.
+        """
+        return self.mark(cell, 0)
+
+
+class CellSet():
+    """
+    Set of cells that also supports picking a random cell, with each
+    operation taking constant time
+    """
+
+    def __init__(self, cells=()):
+        self.cells = list(cells)
+        self.position = {cell: index for index, cell in enumerate(self.cells)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.position
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def discard(self, cell):
+        """
+        Removes the cell if present, moving the last cell into its place.
+        """
+        index = self.position.pop(cell, None)
+        if index is None:
+            return
+        last = self.cells.pop()
+        if index < len(self.cells):
+            self.cells[index] = last
+            self.position[last] = index
+
+    def choice(self):
+        """
+        Returns a random cell of the set.
+        """
+        return self.cells[random.randrange(len(self.cells))]
+
 
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None,
+                 max_inference_steps=10000, time_limit=0.1, backend="pairwise",
+                 sparse=False):
 
-        # Set initial height and width
+        if backend not in ("pairwise", "linear"):
+            raise ValueError(f"Unknown inference backend: {backend}")
+
+        # Set initial height and width, and the number of mines if known
         self.height = height
         self.width = width
+        self.total_mines = mines
+
+        # Seconds allowed for mine probabilities on each random move
+        self.time_limit = time_limit
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -155,8 +349,32 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells in the order they were found, including ones played
+        # since, which are dropped when they reach the front
+        self.pending = deque()
+
+        # Sentences about the game known to be true
+        self.knowledge = KnowledgeBase()
+
+        # Sentences that changed and still need to be checked,
+        # at most `max_inference_steps` of them per move
+        self.worklist = []
+        self.max_inference_steps = max_inference_steps
+
+        # Deduce from pairs of sentences, or by row reducing all of them
+        self.backend = backend
+
+        # Cells not known to be safe or mines. A sparse board keeps no
+        # such set: random moves sample cells instead
+        self.sparse = sparse
+        self.unknown = None
+        if not sparse:
+            self.unknown = CellSet(itertools.product(range(height), range(width)))
+
+        # Number of sentences inferred from pairs of sentences,
+        # and of cells deduced by row reduction
+        self.derived = 0
+        self.deduced = 0
 
     def mark_mine(self, cell):
         """
@@ -164,17 +382,21 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        if self.unknown is not None:
+            self.unknown.discard(cell)
+        self.worklist.extend(self.knowledge.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.safes:
+            self.safes.add(cell)
+            self.pending.append(cell)
+        if self.unknown is not None:
+            self.unknown.discard(cell)
+        self.worklist.extend(self.knowledge.mark_safe(cell))
 
     def get_neighbors(self, cell):
         # Loop over all cells within one row and column
@@ -192,27 +414,94 @@ class MinesweeperAI():
         return neighbors
 
 
-    def compare_sentences(self, new_sentence, sentence):
-        output = Sentence(cells=set(), count=0)
-        if new_sentence.cells.issubset(sentence.cells):
-            output.cells.difference(sentence.cells, new_sentence.cells)
-            output.count = sentence.count - new_sentence.count
-        elif new_sentence.cells.issuperset(sentence.cells):
-            output.cells.difference(new_sentence.cells, sentence.cells)
-            output.count = new_sentence.count - sentence.count
-        return output
+    def add_sentence(self, sentence):
+        """
+        Adds a frozen sentence to the knowledge base and the worklist.
+        A solved sentence is not stored: its cells are marked instead.
+        """
+        mines = sentence.known_mines()
+        safes = sentence.known_safes()
+        if mines or safes:
+            self.knowledge.pruned += 1
+            for mine in mines:
+                self.mark_mine(mine)
+            for safe in safes:
+                self.mark_safe(safe)
+        elif self.knowledge.add(sentence):
+            self.worklist.append(sentence)
+
+    def infer(self):
+        """
+        Propagates the sentences on the worklist until no new conclusion
+        can be drawn, or the per-move step budget runs out. Sentences left
+        on the worklist are picked up by the next call.
+
+        Solved sentences mark their cells as mines or safe. Otherwise,
+        with the pairwise backend, whenever the sentence and an overlapping
+        one are a subset of each other, the superset is replaced by their
+        difference.
+        """
+        steps = 0
+        while self.worklist and steps < self.max_inference_steps:
+            steps += 1
+            sentence = self.worklist.pop()
+            if sentence not in self.knowledge:
+                continue
+
+            if sentence.known_mines() or sentence.known_safes():
+                self.knowledge.remove(sentence)
+                self.add_sentence(sentence)
+                continue
+            if self.backend != "pairwise":
+                continue
+
+            for other in self.knowledge.overlapping(sentence):
+                if other not in self.knowledge:
+                    continue
+                if sentence.cells < other.cells:
+                    subset, superset = sentence, other
+                elif other.cells < sentence.cells:
+                    subset, superset = other, sentence
+                else:
+                    continue
 
+                # The superset follows from the subset and the difference
+                self.knowledge.remove(superset)
+                self.derived += 1
+                self.add_sentence(FrozenSentence(
+                    superset.cells - subset.cells,
+                    superset.count - subset.count
+                ))
+                if superset is sentence or sentence not in self.knowledge:
+                    break
 
-    def check_sentence(self, sentence):
-        if len(sentence.cells) == sentence.count:
-            cellscpy = sentence.cells.copy()
-            for cell in cellscpy:
-                self.mark_mine(cell)
-        elif sentence.count == 0:
-            cellscpy = sentence.cells.copy()
-            for cell in cellscpy:
-                self.mark_safe(cell)
+    def eliminate(self):
+        """
+        Marks every cell that row reducing the whole knowledge base proves
+        to be a mine or safe, until no new cell is found.
+        """
+        while True:
+            mines, safes = elimination.deduce(self.knowledge)
+            if not mines and not safes:
+                break
+            self.deduced += len(mines) + len(safes)
+            for mine in mines:
+                self.mark_mine(mine)
+            for safe in safes:
+                self.mark_safe(safe)
+            self.infer()
 
+    def inference_stats(self):
+        """
+        Returns the counters of the inference engine.
+        """
+        return {
+            "derived": self.derived,
+            "deduced": self.deduced,
+            "pruned": self.knowledge.pruned,
+            "sentences": len(self.knowledge),
+            "pending": len(self.worklist),
+        }
 
     def add_knowledge(self, cell, count):
         """
@@ -232,33 +521,18 @@ class MinesweeperAI():
         self.moves_made.add(cell)
         self.mark_safe(cell)
         neighbors = set()
-        neighbors = self.get_neighbors(cell)
-        for mine in self.mines:
-            if mine in neighbors:
-                neighbors.remove(mine)
+        for neighbor in self.get_neighbors(cell):
+            if neighbor in self.mines:
                 count = count - 1
-        for safe in self.safes:
-            if safe in neighbors:
-                neighbors.remove(safe)
-        new_sentence = Sentence(cells=neighbors, count=count)
-        self.knowledge.append(new_sentence) #3TODO revisar
-        for sent in self.knowledge:
-            comparison = self.compare_sentences(new_sentence, sent)
-            if len(comparison.cells) > 0:
-                self.knowledge.append(comparison)
-        for sent in self.knowledge:
-            self.check_sentence(sent)
-        new_mines = set()
-        new_mines.update(new_sentence.known_mines())
-        if len(new_mines) > 0:
-            for mine in new_mines:
-                self.mark_mine(mine)
-        new_safes = set()
-        new_safes.update(new_sentence.known_safes())
-        if len(new_safes) > 0:
-            for safe in new_safes:
-                self.mark_safe(safe)
+            elif neighbor not in self.safes:
+                neighbors.add(neighbor)
+        self.add_sentence(Sentence(cells=neighbors, count=count).freeze())
+        self.infer()
 
+        # Row reduce once per move, only when no safe move is left to play
+        # (every move made is also in self.safes)
+        if self.backend == "linear" and len(self.safes) == len(self.moves_made):
+            self.eliminate()
 
     def make_safe_move(self):
         """
@@ -268,14 +542,15 @@ class MinesweeperAI():
 
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
+
+        The oldest pending safe cell is returned, and stays pending until
+        it is played.
         """
-        safes_cpy = self.safes.copy()
-        for move in self.moves_made:
-            safes_cpy.remove(move)
-        output = None
-        if len(safes_cpy) > 0:
-            output = safes_cpy.pop()
-        return output
+        while self.pending and self.pending[0] in self.moves_made:
+            self.pending.popleft()
+        if self.pending:
+            return self.pending[0]
+        return None
 
     def make_random_move(self):
         """
@@ -283,15 +558,65 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        Picks the cell least likely to be a mine given the knowledge base
+        and, if known, the total number of mines.
         """
-        unsafe_board = self.moves_made.copy()
-        unsafe_board.update(self.mines)
+        count, candidate = self.unconstrained()
+        mines_left = None
+        if self.total_mines is not None:
+            mines_left = self.total_mines - len(self.mines)
+        probabilities, other = probability.mine_probabilities(
+            self.knowledge, count, mines_left, self.time_limit
+        )
+
         output = None
-        for i in range(self.height):
-            # if not element:
-            for j in range(self.width):
-                element = (i, j)
-                if element not in unsafe_board:
-                    output = element
-                    break
+        risk = None
+        if probabilities:
+            output, risk = min(probabilities.items(), key=lambda item: (item[1], item[0]))
+        if candidate is not None and (output is None or (other is not None and other < risk)):
+            output = candidate
         return output
+
+    def unconstrained(self):
+        """
+        Returns the number of cells that are not known to be safe or mines
+        and that no sentence mentions, and one of those cells (None if
+        there are none).
+
+        The number follows from the sizes of the known sets, and the cell
+        is a free corner or else found by sampling random unknown cells
+        (random cells of the board if it is sparse), so the cost does not
+        grow with the area of the board.
+        """
+        frontier = self.knowledge.index
+        area = self.height * self.width
+        count = area - len(self.safes) - len(self.mines) - len(frontier)
+        if count == 0:
+            return 0, None
+
+        # Corners have the fewest neighbors, so they are the likeliest
+        # to open up the board
+        corners = [
+            (i, j) for i in (0, self.height - 1) for j in (0, self.width - 1)
+        ]
+        for cell in corners:
+            if cell not in self.safes and cell not in self.mines and cell not in frontier:
+                return count, cell
+
+        for _ in range(SAMPLE_ATTEMPTS):
+            if self.unknown is not None:
+                cell = self.unknown.choice()
+            else:
+                cell = divmod(random.randrange(area), self.width)
+            if cell not in self.safes and cell not in self.mines and cell not in frontier:
+                return count, cell
+
+        # Nearly every unknown cell is on the frontier, so look through them
+        cells = self.unknown
+        if cells is None:
+            cells = itertools.product(range(self.height), range(self.width))
+        for cell in cells:
+            if cell not in self.safes and cell not in self.mines and cell not in frontier:
+                return count, cell
+        return count, None
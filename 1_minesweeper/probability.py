@@ -0,0 +1,278 @@
+"""
+Mine probabilities for the Minesweeper frontier
+
+The frontier is split into components of sentences that share cells.
+Each component's valid mine configurations are counted per number of
+mines, and the components are combined with the number of mines left
+among the cells that no sentence mentions.
+"""
+
+import math
+import time
+from collections import deque
+
+# Component counts kept between moves, keyed by frozenset of sentences
+CACHE_SIZE = 4096
+_cache = {}
+
+
+def frontier_components(sentences):
+    """
+    Returns the groups of sentences that share cells,
+    directly or through other sentences.
+    """
+    sentences = list(sentences)
+    parent = list(range(len(sentences)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    owner = {}
+    for index, sentence in enumerate(sentences):
+        for cell in sentence.cells:
+            if cell in owner:
+                parent[find(index)] = find(owner[cell])
+            else:
+                owner[cell] = index
+
+    groups = {}
+    for index, sentence in enumerate(sentences):
+        groups.setdefault(find(index), []).append(sentence)
+    return list(groups.values())
+
+
+def cell_order(sentences):
+    """
+    Returns the cells of the sentences in breadth-first order, so that
+    few sentences are partly assigned at any point of the count.
+    """
+    neighbors = {}
+    for sentence in sentences:
+        for cell in sentence.cells:
+            neighbors.setdefault(cell, set()).update(sentence.cells)
+    order = []
+    seen = set()
+    for start in sorted(neighbors):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            order.append(cell)
+            for neighbor in sorted(neighbors[cell] - seen):
+                seen.add(neighbor)
+                queue.append(neighbor)
+    return order
+
+
+def count_configurations(sentences, deadline=None):
+    """
+    Counts the mine configurations of a component that satisfy all of its
+    sentences.
+
+    Returns the ordered cells, a list `totals` where totals[m] is the number
+    of configurations with m mines, and a dictionary mapping each cell to
+    the same list restricted to configurations with a mine on that cell.
+    Counts are scaled by a common factor. Returns None if the deadline
+    passes first.
+
+    Cells are assigned one at a time, and partial assignments that leave
+    every sentence needing the same number of mines are merged, which
+    memoizes the backtracking.
+    """
+    cells = cell_order(sentences)
+    sentences = list(sentences)
+    position = {cell: index for index, cell in enumerate(cells)}
+
+    # Sentences through each cell, and cells of each sentence left after it
+    through = [[] for _ in cells]
+    remaining = [[0] * len(sentences) for _ in cells]
+    for s, sentence in enumerate(sentences):
+        positions = sorted(position[cell] for cell in sentence.cells)
+        for left, index in enumerate(reversed(positions)):
+            through[index].append(s)
+            remaining[index][s] = left
+
+    def step(state, index, mine):
+        """
+        Returns the state after assigning the cell, or None if a sentence
+        can no longer be satisfied.
+        """
+        state = list(state)
+        for s in through[index]:
+            need = state[s] - mine
+            if need < 0 or need > remaining[index][s]:
+                return None
+            state[s] = need
+        return tuple(state)
+
+    # Forward pass: ways of reaching each state, by number of mines so far
+    start = tuple(sentence.count for sentence in sentences)
+    layers = [{start: {0: 1}}]
+    for index in range(len(cells)):
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+        layer = {}
+        for state, ways in layers[-1].items():
+            for mine in (0, 1):
+                following = step(state, index, mine)
+                if following is None:
+                    continue
+                counts = layer.setdefault(following, {})
+                for mines, count in ways.items():
+                    counts[mines + mine] = counts.get(mines + mine, 0) + count
+        layers.append(layer)
+
+    # Backward pass: ways of completing each state, by number of mines left
+    final = tuple(0 for _ in sentences)
+    completions = {final: {0: 1}}
+    cell_mines = {}
+    for index in range(len(cells) - 1, -1, -1):
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+        previous = {}
+        with_mine = {}
+        for state, ways in layers[index].items():
+            counts = {}
+            for mine in (0, 1):
+                following = step(state, index, mine)
+                if following is None or following not in completions:
+                    continue
+                for mines, count in completions[following].items():
+                    counts[mines + mine] = counts.get(mines + mine, 0) + count
+                    if mine:
+                        for before, ways_count in ways.items():
+                            total = before + mines + 1
+                            with_mine[total] = with_mine.get(total, 0) + ways_count * count
+            if counts:
+                previous[state] = counts
+        completions = previous
+        cell_mines[cells[index]] = with_mine
+
+    size = len(cells) + 1
+    totals = [0] * size
+    for mines, count in layers[-1].get(final, {}).items():
+        totals[mines] = count
+    scale = max(totals) or 1
+    totals = [count / scale for count in totals]
+    for cell, counts in cell_mines.items():
+        scaled = [0.0] * size
+        for mines, count in counts.items():
+            scaled[mines] = count / scale
+        cell_mines[cell] = scaled
+    return cells, totals, cell_mines
+
+
+def convolve(first, second):
+    """
+    Returns the distribution of the sum of two mine counts.
+    """
+    output = [0.0] * (len(first) + len(second) - 1)
+    for i, a in enumerate(first):
+        if a:
+            for j, b in enumerate(second):
+                output[i + j] += a * b
+    return output
+
+
+def log_comb(n, k):
+    """
+    Returns the natural log of n choose k.
+    """
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def mine_probabilities(sentences, unconstrained, mines_left=None, time_limit=None):
+    """
+    Returns a dictionary from each frontier cell to its probability of
+    being a mine, and the probability for any of the `unconstrained` cells
+    that no sentence mentions.
+
+    `mines_left` is the number of mines not yet found; if it is None every
+    frontier configuration is weighted alike. Components not counted within
+    `time_limit` seconds fall back to the average density of their sentences.
+    """
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    probabilities = {}
+    counted = []
+    for component in frontier_components(sentences):
+        key = frozenset(component)
+        if key not in _cache:
+            result = count_configurations(component, deadline)
+            if result is None:
+                estimate_component(component, probabilities)
+                continue
+            if len(_cache) >= CACHE_SIZE:
+                _cache.clear()
+            _cache[key] = result
+        counted.append(_cache[key])
+
+    # Weight of m frontier mines: ways to place the rest off the frontier
+    size = sum(len(totals) - 1 for _, totals, _ in counted) + 1
+    if mines_left is None:
+        weights = [1.0] * size
+    else:
+        logs = [
+            log_comb(unconstrained, mines_left - m)
+            if 0 <= mines_left - m <= unconstrained else None
+            for m in range(size)
+        ]
+        top = max((log for log in logs if log is not None), default=None)
+        if top is None:
+            weights = [1.0] * size
+        else:
+            weights = [0.0 if log is None else math.exp(log - top) for log in logs]
+
+    # Distributions of all components before and after each one
+    prefix = [[1.0]]
+    for _, totals, _ in counted:
+        prefix.append(convolve(prefix[-1], totals))
+    suffix = [[1.0]]
+    for _, totals, _ in reversed(counted):
+        suffix.append(convolve(suffix[-1], totals))
+    suffix.reverse()
+
+    everything = prefix[-1]
+    total = sum(ways * weights[m] for m, ways in enumerate(everything))
+    if total == 0:
+        return probabilities, None
+
+    for index, (cells, _, cell_mines) in enumerate(counted):
+        others = convolve(prefix[index], suffix[index + 1])
+        for cell in cells:
+            ways = sum(
+                count * others_count * weights[m + n]
+                for m, count in enumerate(cell_mines.get(cell, ())) if count
+                for n, others_count in enumerate(others) if others_count
+            )
+            probabilities[cell] = ways / total
+
+    if unconstrained == 0:
+        return probabilities, None
+    if mines_left is None:
+        if not probabilities:
+            return probabilities, None
+        return probabilities, sum(probabilities.values()) / len(probabilities)
+    other = sum(
+        ways * weights[m] * (mines_left - m) / unconstrained
+        for m, ways in enumerate(everything)
+        if 0 <= mines_left - m <= unconstrained
+    ) / total
+    return probabilities, other
+
+
+def estimate_component(sentences, probabilities):
+    """
+    Sets the probability of each cell of a component that could not be
+    counted in time to the average density of the sentences mentioning it.
+    """
+    densities = {}
+    for sentence in sentences:
+        for cell in sentence.cells:
+            densities.setdefault(cell, []).append(sentence.count / len(sentence.cells))
+    for cell, values in densities.items():
+        probabilities[cell] = sum(values) / len(values)
@@ -1,6 +1,5 @@
 import pygame
 import sys
-import time
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -17,6 +16,8 @@ WHITE = (255, 255, 255)
 pygame.init()
 size = width, height = 600, 400
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
+FPS = 60
 
 # Fonts
 OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
@@ -39,7 +40,7 @@ mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
@@ -49,174 +50,212 @@ lost = False
 # Show instructions initially
 instructions = True
 
+# Buttons and the area of the status text, next to the board
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+statusRect = pygame.Rect((2 / 3) * width, (2 / 3) * height - 30, width / 3, 60)
+
+# Surfaces rendered once and reused: an empty cell,
+# the mine counts 0 to 8, the flag and the mine
+tile = pygame.Surface((cell_size, cell_size))
+tile.fill(GRAY)
+pygame.draw.rect(tile, WHITE, tile.get_rect(), 3)
+glyphs = {"flag": flag, "mine": mine}
+for count in range(9):
+    glyphs[count] = smallFont.render(str(count), True, BLACK)
+
+
+def cell_at(position):
+    """
+    Returns the board cell under a screen position, or None.
+    """
+    x = position[0] - board_origin[0]
+    y = position[1] - board_origin[1]
+    if 0 <= x < WIDTH * cell_size and 0 <= y < HEIGHT * cell_size:
+        return (int(y // cell_size), int(x // cell_size))
+    return None
+
+
+def draw_cell(cell):
+    """
+    Draws a cell with its mine, flag or number, and returns its rectangle.
+    """
+    i, j = cell
+    rect = pygame.Rect(
+        board_origin[0] + j * cell_size,
+        board_origin[1] + i * cell_size,
+        cell_size, cell_size
+    )
+    screen.blit(tile, rect)
+
+    # Add a mine, flag, or number if needed
+    glyph = None
+    if lost and game.is_mine(cell):
+        glyph = glyphs["mine"]
+    elif cell in flags:
+        glyph = glyphs["flag"]
+    elif cell in revealed:
+        glyph = glyphs[game.nearby_mines(cell)]
+    if glyph is not None:
+        glyphRect = glyph.get_rect()
+        glyphRect.center = rect.center
+        screen.blit(glyph, glyphRect)
+    return rect
+
+
+def draw_button(rect, label):
+    buttonText = mediumFont.render(label, True, BLACK)
+    buttonRect = buttonText.get_rect()
+    buttonRect.center = rect.center
+    pygame.draw.rect(screen, WHITE, rect)
+    screen.blit(buttonText, buttonRect)
+
+
+# Only cells that changed are drawn again each frame,
+# unless the whole screen needs drawing
+dirty = set()
+redraw = True
+status = None
+
 while True:
 
-    # Check if game quit
+    # Positions of left and right clicks released in this frame, if any
+    left = None
+    right = None
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
-
-    screen.fill(BLACK)
+        elif event.type == pygame.MOUSEBUTTONUP:
+            if event.button == 1:
+                left = event.pos
+            elif event.button == 3:
+                right = event.pos
 
     # Show game instructions
     if instructions:
 
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
         # Play game button
         buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
+
+        if redraw:
+            screen.fill(BLACK)
+
+            # Title
+            title = largeFont.render("Play Minesweeper", True, WHITE)
+            titleRect = title.get_rect()
+            titleRect.center = ((width / 2), 50)
+            screen.blit(title, titleRect)
+
+            # Rules
+            rules = [
+                "Click a cell to reveal it.",
+                "Right-click a cell to mark it as a mine.",
+                "Mark all mines successfully to win!"
+            ]
+            for i, rule in enumerate(rules):
+                line = smallFont.render(rule, True, WHITE)
+                lineRect = line.get_rect()
+                lineRect.center = ((width / 2), 150 + 30 * i)
+                screen.blit(line, lineRect)
+
+            draw_button(buttonRect, "Play Game")
+            pygame.display.flip()
+            redraw = False
 
         # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
-                instructions = False
-                time.sleep(0.3)
+        if left is not None and buttonRect.collidepoint(left):
+            instructions = False
+            redraw = True
 
-        pygame.display.flip()
+        clock.tick(FPS)
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
-
     move = None
 
-    left, _, right = pygame.mouse.get_pressed()
-
     # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
-
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
+    if right is not None and not lost:
+        cell = cell_at(right)
+        if cell is not None and cell not in revealed:
+            if cell in flags:
+                flags.remove(cell)
+            else:
+                flags.add(cell)
+            dirty.add(cell)
+
+    elif left is not None:
 
         # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
+        if aiButton.collidepoint(left) and not lost:
             move = ai.make_safe_move()
             if move is None:
                 move = ai.make_random_move()
                 if move is None:
+                    dirty.update(flags ^ ai.mines)
                     flags = ai.mines.copy()
                     print("No moves left to make.")
                 else:
                     print("No known safe moves, AI making random move.")
             else:
                 print("AI making safe move.")
-            time.sleep(0.2)
 
         # Reset game state
-        elif resetButton.collidepoint(mouse):
+        elif resetButton.collidepoint(left):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
             revealed = set()
             flags = set()
             lost = False
-            continue
+            redraw = True
 
         # User-made move
         elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in flags
-                            and (i, j) not in revealed):
-                        move = (i, j)
+            cell = cell_at(left)
+            if cell is not None and cell not in flags and cell not in revealed:
+                move = cell
 
     # Make move and update AI knowledge
     if move:
+        dirty.add(move)
         if game.is_mine(move):
             lost = True
+            dirty.update(game.mines)
         else:
             nearby = game.nearby_mines(move)
             revealed.add(move)
             ai.add_knowledge(move, nearby)
 
-    pygame.display.flip()
+    # Draw everything after a reset, otherwise only what changed
+    rects = []
+    if redraw:
+        screen.fill(BLACK)
+        dirty = {(i, j) for i in range(HEIGHT) for j in range(WIDTH)}
+        draw_button(aiButton, "AI Move")
+        draw_button(resetButton, "Reset")
+        status = None
+    for cell in dirty:
+        rects.append(draw_cell(cell))
+    dirty.clear()
+
+    # Display text
+    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    if text != status:
+        status = text
+        pygame.draw.rect(screen, BLACK, statusRect)
+        text = mediumFont.render(text, True, WHITE)
+        textRect = text.get_rect()
+        textRect.center = ((5 / 6) * width, (2 / 3) * height)
+        screen.blit(text, textRect)
+        rects.append(statusRect)
+
+    if redraw:
+        pygame.display.flip()
+        redraw = False
+    elif rects:
+        pygame.display.update(rects)
+    clock.tick(FPS)
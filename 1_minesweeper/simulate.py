@@ -0,0 +1,144 @@
+"""
+Headless Minesweeper self-play
+
+Plays seeded games of Minesweeper against MinesweeperAI across a process
+pool, and reports the win rate, throughput, per-move latency and size of
+the knowledge base. Game i uses seed `seed + i`, so runs are reproducible.
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play_game(seed, height, width, mines, backend="pairwise", sparse=False,
+              max_moves=None):
+    """
+    Plays one game until the AI hits a mine or reveals every safe cell.
+
+    With `max_moves`, stops unfinished after that many moves, which is
+    how very large sparse boards are sampled.
+
+    Returns whether the game was won, the AI's time for each move (choosing
+    it and adding the resulting knowledge) and the largest knowledge base.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines, sparse=sparse)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       backend=backend, sparse=sparse)
+
+    latencies = []
+    largest_knowledge = 0
+    revealed = 0
+    won = False
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            latencies.append(time.perf_counter() - start)
+            break
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - start)
+        largest_knowledge = max(largest_knowledge, len(ai.knowledge))
+        revealed += 1
+        if revealed == height * width - mines:
+            won = True
+            break
+        if max_moves is not None and revealed >= max_moves:
+            break
+
+    return {
+        "seed": seed,
+        "won": won,
+        "latencies": latencies,
+        "knowledge": largest_knowledge,
+    }
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of a sorted list of values.
+    """
+    if not values:
+        return 0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return values[index]
+
+
+def simulate(games, height=8, width=8, mines=8, seed=0, workers=None,
+             backend="pairwise", sparse=False, max_moves=None):
+    """
+    Plays `games` games across `workers` processes and returns a
+    dictionary of summary statistics.
+    """
+    start = time.perf_counter()
+    seeds = range(seed, seed + games)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            play_game, seeds,
+            [height] * games, [width] * games, [mines] * games, [backend] * games,
+            [sparse] * games, [max_moves] * games,
+            chunksize=max(1, games // 64)
+        ))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(
+        latency for result in results for latency in result["latencies"]
+    )
+    knowledge = [result["knowledge"] for result in results]
+    return {
+        "games": games,
+        "wins": sum(result["won"] for result in results),
+        "win_rate": sum(result["won"] for result in results) / games,
+        "moves": len(latencies),
+        "moves_per_second": len(latencies) / (sum(latencies) or 1),
+        "elapsed": elapsed,
+        "latency_p50": percentile(latencies, 0.50),
+        "latency_p90": percentile(latencies, 0.90),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_max": latencies[-1] if latencies else 0,
+        "knowledge_mean": sum(knowledge) / games,
+        "knowledge_max": max(knowledge),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Minesweeper AI games headlessly.")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--backend", choices=["pairwise", "linear"], default="pairwise")
+    parser.add_argument("--sparse", action="store_true",
+                        help="store boards sparsely, for very large boards")
+    parser.add_argument("--max-moves", type=int, default=None,
+                        help="stop each game after this many moves")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("at least one game is needed")
+
+    stats = simulate(args.games, args.height, args.width, args.mines,
+                     args.seed, args.workers, args.backend,
+                     args.sparse, args.max_moves)
+    print(f"Games: {stats['games']} on {args.height}x{args.width} "
+          f"with {args.mines} mines ({args.backend} backend)")
+    print(f"  Win rate: {stats['win_rate']:.2%} ({stats['wins']} won)")
+    print(f"  Moves: {stats['moves']}, {stats['moves_per_second']:.0f} AI moves/sec, "
+          f"{stats['elapsed']:.2f}s wall time")
+    print(f"  Move latency: p50 {stats['latency_p50'] * 1000:.3f} ms, "
+          f"p90 {stats['latency_p90'] * 1000:.3f} ms, "
+          f"p99 {stats['latency_p99'] * 1000:.3f} ms, "
+          f"max {stats['latency_max'] * 1000:.3f} ms")
+    print(f"  Knowledge base: {stats['knowledge_mean']:.1f} sentences on average, "
+          f"{stats['knowledge_max']} at most")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+On-disk cache of the link graph of a corpus
+
+The cache lives in a hidden directory inside the corpus. It holds the
+graph as .npy arrays, which are memory-mapped when the corpus has not
+changed, and the raw links of every file as ids into a table of link
+names, together with the size and modification time of the file. When
+some files change, only those are parsed again, and the graph is
+resolved from the raw links of all files with array operations.
+
+Every write is a new generation: its arrays are saved under file names
+holding a random token, and index.json, replaced last, names the token.
+A write that is interrupted leaves the previous index pointing at the
+previous arrays, which are only removed once the new index is in place.
+
+The ranks of the last run are kept alongside, to start the next run from.
+"""
+
+import json
+import os
+import uuid
+
+import numpy as np
+
+import crawler
+from graph import Graph
+
+CACHE_DIRECTORY = ".pagerank"
+CACHE_VERSION = 2
+INDEX_FILE = "index.json"
+ARRAYS = ("offsets", "targets", "link_offsets", "links")
+RANKS_FILE = "ranks"
+
+# Files parsed and reused from the cache by the last load
+cache_stats = {"parsed": 0, "reused": 0}
+
+
+def file_stats(files):
+    """
+    Returns the name, size and modification time of each (name, path) file.
+    """
+    stats = []
+    for name, path in files:
+        stat = os.stat(path)
+        stats.append([name, stat.st_size, stat.st_mtime_ns])
+    return stats
+
+
+def array_file(path, key, generation):
+    """
+    Returns the path of the .npy file of an array of a cache generation.
+    """
+    return os.path.join(path, f"{key}-{generation}.npy")
+
+
+def read_cache(path):
+    """
+    Returns the index and the memory-mapped arrays of the cache in a
+    directory, or None if there is no usable cache.
+    """
+    try:
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get("version") != CACHE_VERSION:
+            return None
+        arrays = {
+            key: np.load(array_file(path, key, index["generation"]), mmap_mode="r")
+            for key in ARRAYS
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+    if (len(arrays["offsets"]) != len(index["files"]) + 1
+            or len(arrays["link_offsets"]) != len(index["files"]) + 1
+            or len(arrays["targets"]) != arrays["offsets"][-1]
+            or len(arrays["links"]) != arrays["link_offsets"][-1]):
+        return None
+    return index, arrays
+
+
+def write_json(path, data):
+    """
+    Writes data as JSON to a file, replacing the previous file at once.
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        f.write(json.dumps(data))
+    os.replace(temporary, path)
+
+
+def remove_stale(path, keys, generation):
+    """
+    Removes the array files of `keys` that belong to other generations
+    than `generation`, or to none as written by older versions.
+    """
+    current = {os.path.basename(array_file(path, key, generation)) for key in keys}
+    for name in os.listdir(path):
+        stem, _, extension = name.rpartition(".")
+        if (extension == "npy" and name not in current
+                and (stem in keys or stem.rpartition("-")[0] in keys)):
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+
+
+def write_cache(path, index, arrays):
+    """
+    Writes the arrays of a cache as a new generation, then the index
+    naming it, and removes the arrays of older generations.
+    """
+    os.makedirs(path, exist_ok=True)
+    generation = uuid.uuid4().hex
+    for key in ARRAYS:
+        np.save(array_file(path, key, generation), arrays[key])
+    write_json(os.path.join(path, INDEX_FILE), dict(index, generation=generation))
+    remove_stale(path, ARRAYS, generation)
+
+
+def resolve(pages, table, parts):
+    """
+    Returns the CSR offsets and targets of the graph of `pages`, where
+    parts[i] holds the links of page i as ids into the list of link
+    names `table`. Links outside the corpus, duplicates and links to the
+    page itself are left out, as in crawler.build_graph.
+    """
+    size = len(pages)
+    page_index = {name: page for page, name in enumerate(pages)}
+    page_of = np.array([page_index.get(name, -1) for name in table], dtype=np.int64)
+
+    degrees = np.array([len(part) for part in parts], dtype=np.int64)
+    links = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+    sources = np.repeat(np.arange(size, dtype=np.int64), degrees)
+    targets = page_of[links]
+    kept = (targets >= 0) & (targets != sources)
+
+    # Sorting the (source, target) pairs orders the links and drops duplicates
+    pairs = np.unique(sources[kept] * size + targets[kept])
+    sources, targets = np.divmod(pairs, size)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=offsets[1:])
+    return offsets, targets
+
+
+def load_graph(directory, workers=None):
+    """
+    Returns the link graph of a directory of HTML pages, parsing only
+    the files that changed since the cache was written, on a pool of
+    `workers` threads, and updating the cache.
+    """
+    path = os.path.join(directory, CACHE_DIRECTORY)
+    files = crawler.html_files(directory)
+    stats = file_stats(files)
+    pages = [name for name, _, _ in stats]
+
+    cached = read_cache(path)
+    if cached is not None and cached[0]["files"] == stats:
+        _, arrays = cached
+        cache_stats["parsed"] = 0
+        cache_stats["reused"] = len(files)
+        return Graph(pages, arrays["offsets"], arrays["targets"])
+
+    # Reuse the links of files whose size and modification time match
+    table = {}
+    previous = {}
+    if cached is not None:
+        index, arrays = cached
+        table = {name: i for i, name in enumerate(index["names"])}
+        for i, (name, size, mtime) in enumerate(index["files"]):
+            previous[name] = (size, mtime, i)
+        cached_offsets = np.asarray(arrays["link_offsets"])
+        cached_links = np.asarray(arrays["links"])
+    parts = [None] * len(files)
+    changed = []
+    for i, (name, size, mtime) in enumerate(stats):
+        entry = previous.get(name)
+        if entry is not None and entry[:2] == (size, mtime):
+            start, end = cached_offsets[entry[2]:entry[2] + 2]
+            parts[i] = cached_links[start:end]
+        else:
+            changed.append(i)
+
+    parsed = crawler.parse_files([files[i][1] for i in changed], workers)
+    for i, links in zip(changed, parsed):
+        parts[i] = np.array(
+            [table.setdefault(link, len(table)) for link in links], dtype=np.int64
+        )
+    cache_stats["parsed"] = len(changed)
+    cache_stats["reused"] = len(files) - len(changed)
+
+    # Keep only the link names still in use
+    table = list(table)
+    links = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+    used, links = np.unique(links, return_inverse=True)
+    links = links.reshape(-1)
+    table = [table[i] for i in used.tolist()]
+    link_offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(part) for part in parts], out=link_offsets[1:])
+    parts = np.split(links, link_offsets[1:-1]) if files else []
+
+    offsets, targets = resolve(pages, table, parts)
+    try:
+        write_cache(
+            path,
+            {"version": CACHE_VERSION, "files": stats, "names": table},
+            {"offsets": offsets, "targets": targets,
+             "link_offsets": link_offsets, "links": links}
+        )
+    except OSError:
+        pass
+    return Graph(pages, offsets, targets)
+
+
+def save_ranks(directory, ranks, damping_factor):
+    """
+    Stores the dictionary of ranks of a corpus for the next run, as a new
+    generation like the graph.
+    """
+    path = os.path.join(directory, CACHE_DIRECTORY)
+    try:
+        os.makedirs(path, exist_ok=True)
+        generation = uuid.uuid4().hex
+        np.save(array_file(path, RANKS_FILE, generation),
+                np.array(list(ranks.values()), dtype=float))
+        write_json(os.path.join(path, RANKS_FILE + ".json"), {
+            "version": CACHE_VERSION,
+            "generation": generation,
+            "damping": damping_factor,
+            "pages": list(ranks),
+        })
+        remove_stale(path, (RANKS_FILE,), generation)
+    except OSError:
+        pass
+
+
+def load_ranks(directory, damping_factor):
+    """
+    Returns the dictionary of ranks stored by the last run on a corpus
+    with the same damping factor, or None.
+    """
+    path = os.path.join(directory, CACHE_DIRECTORY)
+    try:
+        with open(os.path.join(path, RANKS_FILE + ".json")) as f:
+            index = json.load(f)
+        if index.get("version") != CACHE_VERSION:
+            return None
+        ranks = np.load(array_file(path, RANKS_FILE, index["generation"]))
+    except (OSError, ValueError, KeyError):
+        return None
+    if (index.get("damping") != damping_factor
+            or len(index["pages"]) != len(ranks)):
+        return None
+    return dict(zip(index["pages"], ranks.tolist()))
@@ -0,0 +1,97 @@
+"""
+Corpus crawler producing the link graph directly
+
+Files are listed with os.scandir and read in batches on a thread pool.
+Each file is scanned as bytes with a precompiled pattern, large files
+through a memory map so they are never copied, and links are resolved
+straight to the integer IDs of the graph.
+"""
+
+import mmap
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from graph import Graph
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Files at least this large are memory-mapped rather than read, since
+# mapping costs more than reading a small file
+MMAP_SIZE = 1 << 16
+
+# Files parsed by each task of the thread pool
+BATCH_SIZE = 256
+
+
+def html_files(directory):
+    """
+    Returns the names and paths of the HTML files of a directory,
+    sorted by name.
+    """
+    with os.scandir(directory) as entries:
+        files = [
+            (entry.name, entry.path) for entry in entries
+            if entry.name.endswith(".html") and entry.is_file()
+        ]
+    return sorted(files)
+
+
+def parse_links(path):
+    """
+    Returns the list of link targets in an HTML file.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < MMAP_SIZE:
+            links = LINK.findall(f.read())
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+                links = LINK.findall(contents)
+    return [link.decode("utf-8", "replace") for link in links]
+
+
+def parse_batch(paths):
+    """
+    Returns the list of link targets of each of the files.
+    """
+    return [parse_links(path) for path in paths]
+
+
+def build_graph(names, links):
+    """
+    Returns the graph of pages `names`, where links[i] lists the targets
+    of the links on page i. Links to pages outside the corpus, duplicate
+    links and links from a page to itself are left out.
+    """
+    index = {name: page for page, name in enumerate(names)}
+    offsets = [0]
+    targets = []
+    for page, page_links in enumerate(links):
+        linked = {index[link] for link in page_links if link in index}
+        linked.discard(page)
+        targets.extend(sorted(linked))
+        offsets.append(len(targets))
+    return Graph(names, offsets, targets)
+
+
+def parse_files(paths, workers=None):
+    """
+    Returns the list of link targets of each file, parsed in batches
+    on a pool of `workers` threads.
+    """
+    batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+    links = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch_links in executor.map(parse_batch, batches):
+            links.extend(batch_links)
+    return links
+
+
+def crawl_graph(directory, workers=None):
+    """
+    Parses a directory of HTML pages on a pool of `workers` threads
+    and returns their link graph.
+    """
+    files = html_files(directory)
+    links = parse_files([path for _, path in files], workers)
+    return build_graph([name for name, _ in files], links)
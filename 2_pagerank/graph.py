@@ -0,0 +1,105 @@
+"""
+Link graph of a corpus with pages numbered by integers
+
+Pages are interned to the integers 0 to N-1 in sorted name order, and the
+links are kept in compressed sparse row form: the pages linked to by page
+i are targets[offsets[i]:offsets[i + 1]]. The ranking engines work on
+these arrays instead of on dictionaries of sets of names.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class Graph():
+    """
+    Link graph in compressed sparse row form
+    """
+
+    def __init__(self, names, offsets, targets):
+        self.names = list(names)
+        self.index = {name: page for page, name in enumerate(self.names)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Returns the graph of a dictionary from each page to the set
+        of pages it links to, as returned by crawl.
+        """
+        if isinstance(corpus, CorpusView):
+            return corpus.graph
+        names = sorted(corpus)
+        index = {name: page for page, name in enumerate(names)}
+        offsets = [0]
+        targets = []
+        for name in names:
+            targets.extend(sorted(index[link] for link in corpus[name]))
+            offsets.append(len(targets))
+        return cls(names, offsets, targets)
+
+    def __len__(self):
+        return len(self.names)
+
+    def out_degrees(self):
+        """
+        Returns the number of links on each page.
+        """
+        return np.diff(self.offsets)
+
+    def sources(self):
+        """
+        Returns the page each link is on, aligned with self.targets.
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.out_degrees())
+
+    def links(self, page):
+        """
+        Returns the pages linked to by a page, as integers.
+        """
+        return self.targets[self.offsets[page]:self.offsets[page + 1]]
+
+    def view(self):
+        """
+        Returns a read-only dictionary view of the graph, from each page
+        name to the set of page names it links to.
+        """
+        return CorpusView(self)
+
+    def to_corpus(self):
+        """
+        Returns the dictionary from each page name to the set of page
+        names it links to.
+        """
+        return {
+            name: {self.names[target] for target in self.links(page).tolist()}
+            for page, name in enumerate(self.names)
+        }
+
+    def rank_dict(self, ranks):
+        """
+        Returns a dictionary from each page name to its rank.
+        """
+        return dict(zip(self.names, np.asarray(ranks).tolist()))
+
+
+class CorpusView(Mapping):
+    """
+    Read-only view of a graph as a dictionary from each page name to
+    the set of page names it links to, built on access
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        links = self.graph.links(self.graph.index[name])
+        return {self.graph.names[target] for target in links.tolist()}
+
+    def __iter__(self):
+        return iter(self.graph.names)
+
+    def __len__(self):
+        return len(self.graph)
@@ -0,0 +1,152 @@
+"""
+PageRank by power iteration on the link graph
+
+Each sweep multiplies the rank vector by the column-stochastic link
+matrix at once: every link carries rank[source] / out_degree[source] to
+its target, summed with a bincount. Pages without links spread their rank
+over every page, which is added as one scalar (a rank-one correction)
+instead of as N links each.
+
+After the corpus changes a little, the ranks of the previous run are a
+close starting point. From there, either power iteration converges in
+fewer sweeps, or the residual of each page can be pushed to the pages it
+links to, only where it is still large.
+"""
+
+import numpy as np
+
+# Stop once a sweep changes the ranks by less than this in total (L1)
+TOLERANCE = 1e-10
+MAX_SWEEPS = 1000
+
+# Sweeps over the whole graph, push rounds and pages pushed by the last call
+iteration_stats = {"sweeps": 0, "rounds": 0, "pushes": 0}
+
+
+class LinkMatrix():
+    """
+    Column-stochastic link matrix of a graph, built once and applied
+    to rank vectors
+    """
+
+    def __init__(self, graph):
+        self.size = len(graph)
+        degrees = graph.out_degrees()
+        self.sources = graph.sources()
+        self.targets = graph.targets
+        self.weights = 1 / degrees[self.sources]
+        self.dangling = np.flatnonzero(degrees == 0)
+
+    def apply(self, ranks):
+        """
+        Returns the ranks after one step of following links, where
+        pages without links link to every page.
+        """
+        spread = np.bincount(
+            self.targets, weights=ranks[self.sources] * self.weights,
+            minlength=self.size
+        )
+        return spread + ranks[self.dangling].sum() / self.size
+
+
+def power_iteration(graph, damping_factor, ranks=None,
+                    tolerance=TOLERANCE, max_sweeps=MAX_SWEEPS):
+    """
+    Returns the array of PageRank values of the pages of a graph,
+    starting from `ranks` or from the uniform distribution.
+    """
+    size = len(graph)
+    matrix = LinkMatrix(graph)
+    if ranks is None:
+        ranks = np.full(size, 1 / size)
+    teleport = (1 - damping_factor) / size
+
+    iteration_stats.update(sweeps=0, rounds=0, pushes=0)
+    while iteration_stats["sweeps"] < max_sweeps:
+        iteration_stats["sweeps"] += 1
+        updated = teleport + damping_factor * matrix.apply(ranks)
+        delta = np.abs(updated - ranks).sum()
+        ranks = updated
+        if delta < tolerance:
+            break
+    return ranks
+
+
+def warm_start(graph, previous):
+    """
+    Returns starting ranks for a graph from the dictionary of ranks of
+    a previous run. Pages that were ranked keep their rank, scaled by the
+    change in the number of pages so that teleporting still balances, and
+    new pages start with the average rank 1/N.
+    """
+    size = len(graph)
+    ranks = np.full(size, 1 / size)
+    known = [
+        (page, previous[name])
+        for page, name in enumerate(graph.names) if name in previous
+    ]
+    if known:
+        pages, values = zip(*known)
+        ranks[list(pages)] = np.array(values) * len(previous) / size
+    return ranks / ranks.sum()
+
+
+def absorb(ranks, uniform, damping_factor):
+    """
+    Returns the ranks corrected for a residual of `uniform` on every page.
+    The correction is uniform * N / (1 - d) times PageRank itself, which
+    the ranks approximate closely.
+    """
+    return ranks + uniform * len(ranks) / (1 - damping_factor) * ranks / ranks.sum()
+
+
+def push(graph, damping_factor, ranks, tolerance=TOLERANCE, max_rounds=MAX_SWEEPS):
+    """
+    Returns the array of PageRank values of the pages of a graph,
+    improving `ranks` by pushing residuals, in the manner of Gauss-Southwell.
+
+    The residual of a page is how much its rank falls short of the
+    PageRank equation. Each round, every page whose residual is above
+    tolerance / N adds it to its rank and passes the damped share on to
+    the pages it links to, so after a small change to the corpus only the
+    pages around the change do any work. Pages without links pass their
+    share on to every page at once, as one scalar.
+    """
+    size = len(graph)
+    matrix = LinkMatrix(graph)
+    degrees = graph.out_degrees()
+    teleport = (1 - damping_factor) / size
+    ranks = np.asarray(ranks, dtype=float)
+
+    # A page gaining or losing all its links shifts every residual alike,
+    # which is absorbed at once rather than pushed from every page
+    residual = teleport + damping_factor * matrix.apply(ranks) - ranks
+    ranks = absorb(ranks, np.median(residual), damping_factor)
+    residual = teleport + damping_factor * matrix.apply(ranks) - ranks
+    threshold = tolerance / size
+    uniform = 0
+    iteration_stats.update(sweeps=2, rounds=0, pushes=0)
+
+    while iteration_stats["rounds"] < max_rounds:
+        active = np.flatnonzero(np.abs(residual) > threshold)
+        if len(active) == 0:
+            break
+        iteration_stats["rounds"] += 1
+        iteration_stats["pushes"] += len(active)
+        values = residual[active]
+        ranks[active] += values
+        residual[active] = 0
+
+        # Share of each active page for each of its links
+        counts = degrees[active]
+        linking = counts > 0
+        counts = counts[linking]
+        shares = np.repeat(damping_factor * values[linking] / counts, counts)
+        firsts = graph.offsets[active[linking]]
+        positions = np.arange(counts.sum()) + np.repeat(firsts - np.cumsum(counts) + counts, counts)
+        np.add.at(residual, graph.targets[positions], shares)
+
+        # Pages without links spread over every page, kept as one scalar
+        uniform += damping_factor * values[~linking].sum() / size
+
+    return absorb(ranks, uniform, damping_factor)
@@ -1,24 +1,46 @@
-import os
+import argparse
 import random
-import re
-import sys
+
+import cache
+import crawler
+import iteration
+import sampling
+from graph import Graph
 
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    parser = argparse.ArgumentParser(description="Rank the pages of a corpus.")
+    parser.add_argument("corpus")
+    parser.add_argument("-n", "--samples", type=int, default=SAMPLES)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes to sample with (0 for one per CPU)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse every page instead of using the link graph cache")
+    parser.add_argument("--local", action="store_true",
+                        help="update the cached ranks only around changed pages")
+    args = parser.parse_args()
+    if args.samples < 1:
+        parser.error("at least one sample is needed")
+
+    previous = None
+    if args.no_cache:
+        corpus = crawl(args.corpus)
+    else:
+        corpus = cache.load_graph(args.corpus).view()
+        previous = cache.load_ranks(args.corpus, DAMPING)
+    ranks = sample_pagerank(corpus, DAMPING, args.samples, args.workers or None)
+    print(f"PageRank Results from Sampling (n = {args.samples})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    ranks = iterate_pagerank(corpus, DAMPING, previous, args.local)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
+    if not args.no_cache:
+        cache.save_ranks(args.corpus, ranks, DAMPING)
 
 
 def crawl(directory):
@@ -26,26 +48,11 @@ def crawl(directory):
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
 
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
-
-    return pages
+    The dictionary is a read-only view of the link graph, which the
+    ranking functions use directly.
+    """
+    return crawler.crawl_graph(directory).view()
 
 
 def transition_model(corpus, page, damping_factor):
@@ -81,29 +88,30 @@ def add_if_valid(current, new):
     return output
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, workers=1):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    With more than one worker, the samples are split across a pool of
+    `workers` processes (None for one per CPU).
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    sample = random.choice(list(corpus.keys()))
-    index = 1
-    sampling = {}
-    while index < n:
-        tm = transition_model(corpus, sample, damping_factor)
-        sampling[sample] = add_if_valid(sampling.get(sample), 1)
-        index = index + 1
-        sample = random.choices(list(tm.keys()), weights=list(tm.values()))[0]
-    for sample in list(sampling.keys()):
-        sampling[sample] = sampling[sample] / n
-    return sampling
-
-
-def iterate_pagerank(corpus, damping_factor):
+    graph = Graph.from_corpus(corpus)
+
+    # NumPy random streams seeded from `random`, so random.seed still applies
+    seed = random.getrandbits(64)
+    if workers == 1:
+        counts = sampling.serial_visits(graph, damping_factor, n, seed)
+    else:
+        counts = sampling.parallel_visits(graph, damping_factor, n, seed, workers)
+    return graph.rank_dict(counts / n)
+
+
+def iterate_pagerank(corpus, damping_factor, ranks=None, local=False):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -111,43 +119,18 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-    pagesCount = len(corpus)
-    pageRanks = init_corpus_map(corpus.keys(), 1 / pagesCount)
-    shouldStop = False
-    MIN_DELTA = 0.001
-    while (shouldStop == False):
-        shouldStop = True
-        for page in list(pageRanks.keys()):
-            new_rank = (1-damping_factor) / pagesCount
-            linkSum = 0
-            pagesThatLink = get_pages_that_link(corpus, page)
-            numLinks = pagesCount
-            for linked in pagesThatLink:
-                numLinksCount = len(corpus[linked])
-                if numLinksCount > 0:
-                    numLinks = numLinksCount
-                linkSum = linkSum + pageRanks[linked] / numLinks
-            new_rank = new_rank + damping_factor * linkSum
-            if (abs(pageRanks[page] - new_rank) > MIN_DELTA):
-                shouldStop = False
-            pageRanks[page] = new_rank
-    return pageRanks
-
-
-def init_corpus_map(corpus, value):
-    output = {}
-    for link in corpus:
-        output[link] = add_if_valid(0, value)
-    return output
-
 
-def get_pages_that_link(corpus, page):
-    output = []
-    for index in corpus:
-        if page in corpus[index] or len(corpus[index]) == 0:
-            output.append(index)
-    return output
+    If `ranks` holds the results of a previous run, start from them. With
+    `local`, only push the remaining residuals from the pages around the
+    changes, instead of sweeping over every page until convergence.
+    """
+    graph = Graph.from_corpus(corpus)
+    if ranks is None:
+        return graph.rank_dict(iteration.power_iteration(graph, damping_factor))
+    start = iteration.warm_start(graph, ranks)
+    if local:
+        return graph.rank_dict(iteration.push(graph, damping_factor, start))
+    return graph.rank_dict(iteration.power_iteration(graph, damping_factor, start))
 
 
 if __name__ == "__main__":
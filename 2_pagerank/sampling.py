@@ -0,0 +1,165 @@
+"""
+PageRank by sampling many random surfers at once
+
+The surfers are kept in a NumPy array of current pages and all take a
+step together. A step follows a link with probability `damping_factor`,
+and otherwise, or from a page without links, jumps to any page. Both are
+uniform choices, so drawing one is a single random index into the page's
+slice of the link array (or into all pages): a Walker alias table for a
+uniform distribution is the identity, and the CSR arrays already are the
+per-page tables.
+
+For very many steps, the walks can be split into shards sampled by a pool
+of processes that map the graph from shared memory.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Each surfer takes at least this many steps, since every walk starts on a
+# uniformly random page rather than from PageRank itself
+STEPS_PER_SURFER = 1000
+MAX_SURFERS = 100000
+
+# Visits recorded before they are added up with a bincount
+BUFFER_SIZE = 1 << 20
+
+# Smallest and most pieces the walks are split into for a process pool
+SHARD_STEPS = 5000000
+MAX_SHARDS = 64
+
+# Graph arrays mapped from shared memory in a worker process
+_shared = {}
+
+
+def step(offsets, targets, degrees, pages, damping_factor, rng):
+    """
+    Returns the pages the surfers on `pages` visit next.
+    """
+    size = len(degrees)
+    degrees = degrees[pages]
+    following = np.flatnonzero((rng.random(len(pages)) < damping_factor) & (degrees > 0))
+    following_pages = pages[following]
+    chosen = offsets[following_pages] + (
+        rng.random(len(following)) * degrees[following]
+    ).astype(np.int64)
+
+    # Everyone else jumps to a page chosen uniformly at random
+    pages = rng.integers(size, size=len(pages))
+    pages[following] = targets[chosen]
+    return pages
+
+
+def sample_visits(offsets, targets, damping_factor, n, rng):
+    """
+    Returns the number of times each page of the graph with CSR arrays
+    `offsets` and `targets` is visited by surfers taking `n` steps in
+    total, counting the page each surfer starts on.
+    """
+    degrees = np.diff(offsets)
+    size = len(degrees)
+    surfers = max(1, min(MAX_SURFERS, n // STEPS_PER_SURFER))
+    rounds, extra = divmod(n, surfers)
+    counts = np.zeros(size, dtype=np.int64)
+
+    pages = rng.integers(size, size=surfers)
+    buffer = np.empty((max(1, BUFFER_SIZE // surfers), surfers), dtype=np.int64)
+    filled = 0
+    for _ in range(rounds):
+        buffer[filled] = pages
+        filled += 1
+        if filled == len(buffer):
+            counts += np.bincount(buffer.ravel(), minlength=size)
+            filled = 0
+        pages = step(offsets, targets, degrees, pages, damping_factor, rng)
+    counts += np.bincount(buffer[:filled].ravel(), minlength=size)
+    counts += np.bincount(pages[:extra], minlength=size)
+    return counts
+
+
+def share(array):
+    """
+    Returns a new shared memory block holding a copy of an int64 array.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=np.int64, buffer=block.buf)[:] = array
+    return block
+
+
+def attach(blocks):
+    """
+    Maps the graph arrays shared by the parent process, given the name
+    and length of the block of each array. Runs once in each worker.
+    """
+    for key, (name, length) in blocks.items():
+        block = shared_memory.SharedMemory(name=name)
+        _shared[key] = (block, np.ndarray((length,), dtype=np.int64, buffer=block.buf))
+
+
+def sample_shard(damping_factor, n, seed):
+    """
+    Returns the visit counts of one shard of the walks, drawn from its
+    own random stream.
+    """
+    _, offsets = _shared["offsets"]
+    _, targets = _shared["targets"]
+    rng = np.random.default_rng(seed)
+    return sample_visits(offsets, targets, damping_factor, n, rng)
+
+
+def plan_shards(n, seed):
+    """
+    Returns the number of steps and the seed of each shard of `n` surfer
+    steps. Each shard draws from a stream spawned from
+    numpy.random.SeedSequence of `seed`, and the number of shards depends
+    only on `n`, so the walks are the same however the shards are run.
+    """
+    shards = max(1, min(MAX_SHARDS, n // SHARD_STEPS))
+    sizes = [n // shards + (shard < n % shards) for shard in range(shards)]
+    return sizes, np.random.SeedSequence(seed).spawn(shards)
+
+
+def serial_visits(graph, damping_factor, n, seed):
+    """
+    Returns the visit counts of `n` surfer steps, sampling the shards of
+    plan_shards one after another in this process.
+    """
+    counts = np.zeros(len(graph), dtype=np.int64)
+    for size, shard_seed in zip(*plan_shards(n, seed)):
+        rng = np.random.default_rng(shard_seed)
+        counts += sample_visits(graph.offsets, graph.targets, damping_factor, size, rng)
+    return counts
+
+
+def parallel_visits(graph, damping_factor, n, seed, workers=None):
+    """
+    Returns the visit counts of `n` surfer steps split into shards across
+    a pool of `workers` processes.
+
+    The shards are those of plan_shards, so the result is the same as that
+    of serial_visits for any number of workers. The graph is placed in
+    shared memory once instead of being pickled for every shard.
+    """
+    sizes, seeds = plan_shards(n, seed)
+    shards = len(sizes)
+
+    blocks = {"offsets": share(graph.offsets), "targets": share(graph.targets)}
+    names = {
+        "offsets": (blocks["offsets"].name, len(graph.offsets)),
+        "targets": (blocks["targets"].name, len(graph.targets)),
+    }
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach,
+                                 initargs=(names,)) as executor:
+            counts = np.zeros(len(graph), dtype=np.int64)
+            for shard_counts in executor.map(
+                sample_shard, [damping_factor] * shards, sizes, seeds
+            ):
+                counts += shard_counts
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+    return counts